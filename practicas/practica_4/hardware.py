@@ -141,6 +141,18 @@ class Memory():
     def read(self, addr):
         return self._cells[addr]
 
+    ## escribe de una vez una secuencia de celdas a partir de addr
+    ## (como las escrituras de a una, falla si el bloque se pasa del final de la memoria)
+    def write_block(self, addr, values):
+        values = list(values)
+        if addr < 0 or addr + len(values) > self._size:
+            raise IndexError("memory block [{first}, {last}) out of range, memory size is {size}".format(first=addr, last=addr + len(values), size=self._size))
+        self._cells[addr:addr + len(values)] = values
+
+    ## lee de una vez n celdas a partir de addr
+    def read_block(self, addr, n):
+        return self._cells[addr:addr + n]
+
     @property
     def size(self):
         return self._size
@@ -317,9 +317,7 @@ class Loader():
     def load(self, prg):
         # loads the program in main memory
         progSize = len(prg.instructions)
-        for index in range(0, progSize):
-            inst = prg.instructions[index]
-            HARDWARE.memory.write(index + self._nextDir, inst)
+        HARDWARE.memory.write_block(self._nextDir, prg.instructions)
         self._nextDir += progSize
         return self._nextDir - progSize
 
@@ -339,21 +339,11 @@ class Loader():
         log.logger.info("pages needed: {}".format(pagesNeeded))
         frames = self._mm.allocFrames(pagesNeeded)
         pcb.setPageTable(frames)
-        j = 0
-        k = 0
-        for inst in prg.instructions:
-            if j < self._mm.frameSize:
-                HARDWARE.memory.write(j + (frames[k] * frameSize), inst)
-                log.logger.info("page: {p} - offset: {cel} - instr: {inst}".format(cel=j + (frames[k]*frameSize),
-                                                                                          inst=inst, p=frames[k]))
-                j += 1
-            else:
-                j = 1
-                k += 1
-                HARDWARE.memory.write(frames[k] * frameSize, inst)
-                log.logger.info("page: {fr} - offset: {cel} - instr: {inst}".format(cel= (frames[k] * frameSize),
-                                                                                        inst=inst, fr=frames[k]))
-
+        for page in range(0, pagesNeeded):
+            firstInst = page * frameSize
+            pageInstr = prg.instructions[firstInst:firstInst + frameSize]
+            HARDWARE.memory.write_block(frames[page] * frameSize, pageInstr)
+            log.logger.info("page: {p} - frame: {fr} - instr: {inst}".format(p=page, fr=frames[page], inst=pageInstr))
 
 
 class Dispatcher():
@@ -1,33 +1,116 @@
 import log
 from so import *
+from array import array
+
+## codigos de estado que se guardan por tick para cada pcb
+## (so importa este modulo antes de definir sus constantes, por eso los estados van como texto)
+ABSENT_CODE = 0           # el pcb todavia no existia
+STATE_CODES = {"NEW": 1, "READY": 2, "RUNNING": 3, "WAITING": 4, "TERMINATED": 5}
+RUNNING_CODE = STATE_CODES["RUNNING"]
+TERMINATED_CODE = STATE_CODES["TERMINATED"]
+
+
+# --registra el diagrama de gantt por columnas: un codigo de estado por pcb por tick
+class GanttRecorder():
+
+    def __init__(self):
+        self._ticks = array('q')           # numero de tick de cada columna (64 bits, metrics lo lee como int64)
+        self._states = dict()              # pid -> array('B') con un codigo por columna
+        self._readyQ = array('l')          # pids de la readyQ de todas las columnas, concatenados
+        self._readyOffsets = array('l', [0])   # donde empieza la readyQ de cada columna
+
+    # agrega "times" columnas iguales a partir del tick indicado
+    def record(self, table, readyQ, tick, times=1):
+        columns = len(self._ticks)
+        self._ticks.extend(range(tick, tick + times))
+        for pcb in table.allPCBs():
+            states = self._states.get(pcb.pid)
+            if states is None:
+                states = array('B', [ABSENT_CODE]) * columns
+                self._states[pcb.pid] = states
+            states.extend(array('B', [STATE_CODES[pcb.state]]) * times)
+        pids = array('l', [pcb.pid for pcb in readyQ])
+        for _ in range(times):
+            self._readyQ.extend(pids)
+            self._readyOffsets.append(len(self._readyQ))
+
+    @property
+    def columns(self):
+        return len(self._ticks)
+
+    @property
+    def ticks(self):
+        return self._ticks
+
+    def pids(self):
+        return sorted(self._states)
+
+    # codigos de estado del pcb, uno por columna
+    # (un pcb que salio de la tabla, por ejemplo archivado al terminar, sigue como terminado)
+    def states(self, pid):
+        states = self._states[pid]
+        missing = len(self._ticks) - len(states)
+        if missing:
+            states.extend(array('B', [TERMINATED_CODE]) * missing)
+        return states
+
+    # pids en la readyQ en la columna indicada
+    def readyQAt(self, column):
+        return self._readyQ[self._readyOffsets[column]:self._readyOffsets[column + 1]]
+
+    # [pid, t. espera, t. retorno] de cada pcb
+    # (mientras no termino, cada tick que no esta en CPU cuenta como espera)
+    def analysis(self):
+        result = []
+        for pid in self.pids():
+            states = self.states(pid)
+            turnaround = len(states) - states.count(ABSENT_CODE) - states.count(TERMINATED_CODE)
+            waiting = turnaround - states.count(RUNNING_CODE)
+            result.append([pid, waiting, turnaround])
+        return result
+
 
 # --un objeto que haga "marcos" y otras utilidades con el logger a fines esteticos
 class LoggerDesign():
 
-    def __init__(self):
-        # Cada elemento de la lista es un renglon a imprimir de la tabla
-        self._proceso = ["|Proceso   |"]
-        self._queue = ["|ReadyQ    |"]
-        self._analysis = []
-        self._data = []
-        self._analysis.append("|Proceso   |T. Espera |T. Retorno|")
-
-    def printGantt(self, table, readyQ, tick):
-        # Actualiza lista de renglones de la tabla
-        self.actualizarProcesos(table, tick)
-        self.actualizarQueue(readyQ, tick)
-        self.actualizarAnalysis(table)
+    def __init__(self, window=17):
+        self._recorder = GanttRecorder()
+        # cantidad de ticks (columnas) que se muestran en el diagrama
+        self._window = window
+        # cada cuantos ticks registrados se imprime el diagrama (0 = solo a pedido)
+        self._refresh = 0
+
+    @property
+    def recorder(self):
+        return self._recorder
+
+    def setRefresh(self, ticks):
+        self._refresh = ticks
+
+    # descarta todo lo registrado (para empezar otra simulacion con el mismo designer)
+    def reset(self):
+        self._recorder = GanttRecorder()
 
+    # registra el estado de los pcbs y la readyQ (no imprime nada salvo que haya refresh)
+    def recordGantt(self, table, readyQ, tick, times=1):
+        before = self._recorder.columns
+        self._recorder.record(table, readyQ, tick, times)
+        if self._refresh and (before // self._refresh) != (self._recorder.columns // self._refresh):
+            self.printGantt()
+
+    # imprime las ultimas columnas del diagrama y el analisis de tiempos
+    def printGantt(self):
+        if not log.isEnabled():
+            return
         self.title("DIAGRAMA DE GANTT")
-        # imprime todos los renglones de cada tabla
         self.printBar()
-        for text in self._proceso:
+        for text in self.procesosRows():
             log.logger.info(text)
         self.printBar()
-        for text in self._queue:
+        for text in self.queueRows():
             log.logger.info(text)
         self.printBar()
-        for text in self._analysis:
+        for text in self.analysisRows():
             log.logger.info(text)
         self.printBar()
 
@@ -46,120 +129,61 @@ class LoggerDesign():
     def centerMessage(self, message):
         log.logger.info("|" + message.center(78) + "|")
 
-    def actualizarProcesos(self, table, tick):
-        # guardo el tick como string
-        tickFormat = "{}".format(tick)
-        # quito primer columna de la tabla
-        self._proceso[0] = self._proceso[0][12:]
-        # relleno la tabla con espacios
-        self._proceso[0] = self._proceso[0].rjust(68)
-        # agrego el nuevo tick
-        self._proceso[0] = self._proceso[0] + tickFormat.center(3) + "|"
-        # recupero la columna quitada y agrego el resto del renglon
-        self._proceso[0] = "|Proceso  |" + self._proceso[0][3:]
-
-        i = 1
-        for pcb in table.allPCBs():
-            # si el pcb no esta en la tabla de gantt
-            pcbid = "{}".format(pcb.pid)
-            pcbid = "|" + pcbid.rjust(9) + "|"
-            if pcb.state == "RUNNING":
-                state = "CPU|"
-            else:
-                state = " - |"
-            if i+1 > len(self._proceso):
-                #genero nueva linea
-                newLine = pcbid + state.rjust(69)
-                #la agrego como otro renglon de la tabla
-                self._proceso.append(newLine)
-            else:
-                self._proceso[i] = self._proceso[i][12:]
-                self._proceso[i] = self._proceso[i].rjust(68)
-                self._proceso[i] = self._proceso[i] + state
-                self._proceso[i] = pcbid + self._proceso[i][3:]
-            i = i + 1
-
-    def actualizarQueue(self, readyQ, tick):
-        tickFormat = "{}".format(tick)
-        self._queue[0] = self._queue[0][12:]
-        self._queue[0] = self._queue[0].rjust(68)
-        self._queue[0] = self._queue[0] + tickFormat.center(3) + "|"
-        self._queue[0] = "|ReadyQ   |" + self._queue[0][3:]
-
-        i = 1
-        for pcb in readyQ:
-            pcbid = "{}".format(pcb.pid)
-            pcbid = pcbid.center(3) + "|"
-            # si hay mas pcbs que renglones
-            if i+1 > len(self._queue):
-                #genero nueva linea
-                newLine = "|         |".ljust(76) + pcbid
-                #la agrego como otro renglon de la tabla
-                self._queue.append(newLine)
-            else:
-                self._queue[i] = self._queue[i][12:]
-                self._queue[i] = self._queue[i].rjust(68)
-                self._queue[i] = self._queue[i] + pcbid
-                self._queue[i] = "|         |" + self._queue[i][3:]
-            i = i + 1
-        #si hay menos pcbs en queue que renglones, hay que quitar renglones
-        while i < len(self._queue):
-            self._queue[i] = self._queue[i][12:]
-            self._queue[i] = self._queue[i].rjust(68)
-            self._queue[i] = self._queue[i] + "   |"
-            self._queue[i] = "|         |" + self._queue[i][3:]
-            i = i + 1
-
-    def actualizarAnalysis(self, table):
-        sizeT = len(table.allPCBs())
-        if table.runningPCB != None:
-            pActual = table.runningPCB.pid
-        else:
-            pActual = -1
-        if len(self._data) == sizeT:
-            #hay que actualizar info
-            for proceso in self._data:
-                if not proceso[3]: ##Si aún no había terminado
-                    if table.getPCB(proceso[0]).state == "TERMINATED": #Veo si terminó
-                        proceso[3] = True
-                    else: #Si no termino actualizo data
-                        if proceso[0] != pActual: ##Veo si esta esperando
-                            proceso[1] += 1
-                        proceso[2] += 1 ##Agregar 1 al t retorno.            
-        else:
-            #hay que agregar pcbs nuevos
-            i = len(self._data)
-            while len(self._data) < sizeT:
-                #pid, t espera, t retorno, ¿finalizo?
-                if pActual == i:
-                    t = 0
-                else:
-                    t = 1
-                self._data.append([i,t,1, False])
-                i += 1
-        j = 0
+    # columnas visibles (las ultimas "window")
+    def visibleColumns(self):
+        last = self._recorder.columns
+        return range(max(0, last - self._window), last)
+
+    # arma un renglon: primer columna + una celda de 3 caracteres por tick, alineado a derecha
+    def row(self, first, cells):
+        blank = "   |" * (self._window - len(cells))
+        return first + blank + "".join(cell + "|" for cell in cells)
+
+    def procesosRows(self):
+        columns = self.visibleColumns()
+        ticks = self._recorder.ticks
+        rows = [self.row("|Proceso  |", [str(ticks[c]).center(3) for c in columns])]
+        for pid in self._recorder.pids():
+            states = self._recorder.states(pid)
+            cells = [self.stateCell(states[c]) for c in columns]
+            rows.append(self.row("|" + str(pid).rjust(9) + "|", cells))
+        return rows
+
+    def stateCell(self, code):
+        if code == RUNNING_CODE:
+            return "CPU"
+        if code == ABSENT_CODE:
+            return "   "
+        return " - "
+
+    def queueRows(self):
+        columns = self.visibleColumns()
+        ticks = self._recorder.ticks
+        rows = [self.row("|ReadyQ   |", [str(ticks[c]).center(3) for c in columns])]
+        queues = [self._recorder.readyQAt(c) for c in columns]
+        depth = max([len(queue) for queue in queues] + [0])
+        for i in range(depth):
+            cells = [str(queue[i]).center(3) if i < len(queue) else "   " for queue in queues]
+            rows.append(self.row("|         |", cells))
+        return rows
+
+    def analysisRows(self):
+        rows = ["|Proceso   |T. Espera |T. Retorno|"]
+        data = self._recorder.analysis()
         totale = 0
         totalr = 0
-        self._analysis = [self._analysis[0]]
-        while j < len(self._data):
-            pid = str(self._data[j][0]).center(10)
-            tesp = str(self._data[j][1]).center(10)
-            tret = str(self._data[j][2]).center(10)
-            self._analysis.append("|" + pid + "|" + tesp + "|" + tret + "|")
-            totale += self._data[j][1]
-            totalr += self._data[j][2]
-            j += 1
-        stotale = str(totale).center(3)
-        stotalr = str(totalr).center(3)
-        if j != 0:
-            pre = totale // j
-            prr = totalr // j
+        for pid, wait, turnaround in data:
+            rows.append("|" + str(pid).center(10) + "|" + str(wait).center(10) + "|" + str(turnaround).center(10) + "|")
+            totale += wait
+            totalr += turnaround
+        if data:
+            pre = totale // len(data)
+            prr = totalr // len(data)
         else:
             pre = 0
             prr = 0
-        pre = str(pre).center(3)
-        prr = str(prr).center(3)
-        self._analysis.append("|Total     |{te}       |{tr}       |".format(te=stotale, tr=stotalr))
-        self._analysis.append("|Promedio  |{pe}       |{pr}       |".format(pe=pre, pr=prr))
+        rows.append("|Total     |{te}       |{tr}       |".format(te=str(totale).center(3), tr=str(totalr).center(3)))
+        rows.append("|Promedio  |{pe}       |{pr}       |".format(pe=str(pre).center(3), pr=str(prr).center(3)))
+        return rows
 
-DESIGNER = LoggerDesign()
\ No newline at end of file
+DESIGNER = LoggerDesign()
@@ -3,12 +3,57 @@
 from tabulate import tabulate
 from time import sleep
 from threading import Thread, Lock
+from heapq import heappush, heappop
+from itertools import count, repeat
+from array import array
+from collections import OrderedDict
+from random import choice
 import log
+from tracer import Tracer, TRACE, EVENT_IRQ, NO_PID
+
+##  Estos son los codigos de operacion (opcodes) soportados por nuestro CPU
+OPCODE_NOOP = 0
+OPCODE_CPU = 1
+OPCODE_IO = 2
+OPCODE_EXIT = 3
+
+##  Cada instruccion ocupa una celda de 16 bits: el opcode en el byte alto
+##  y el operando (ej: el id del dispositivo de IO) en el byte bajo
+OPERAND_BITS = 8
+OPERAND_MASK = (1 << OPERAND_BITS) - 1
 
 ##  Estas son la instrucciones soportadas por nuestro CPU
-INSTRUCTION_IO = 'IO'
-INSTRUCTION_CPU = 'CPU'
-INSTRUCTION_EXIT = 'EXIT'
+INSTRUCTION_IO = OPCODE_IO << OPERAND_BITS
+INSTRUCTION_CPU = OPCODE_CPU << OPERAND_BITS
+INSTRUCTION_EXIT = OPCODE_EXIT << OPERAND_BITS
+
+MNEMONICS = {OPCODE_NOOP: '', OPCODE_CPU: 'CPU', OPCODE_IO: 'IO', OPCODE_EXIT: 'EXIT'}
+
+
+## emulates a run of the same instruction repeated "times" times
+## (ej: ASM.CPU(1000) no genera una lista de 1000 instrucciones)
+class InstructionRun():
+
+    def __init__(self, instruction, times):
+        self._instruction = instruction
+        self._times = times
+
+    @property
+    def instruction(self):
+        return self._instruction
+
+    @property
+    def times(self):
+        return self._times
+
+    def __len__(self):
+        return self._times
+
+    def __iter__(self):
+        return repeat(self._instruction, self._times)
+
+    def __repr__(self):
+        return "{instr} x {times}".format(instr=ASM.mnemonic(self._instruction), times=self._times)
 
 
 ## Helper for emulated machine code
@@ -16,23 +61,46 @@ class ASM():
 
     @classmethod
     def EXIT(self, times):
-        return [INSTRUCTION_EXIT] * times
+        return InstructionRun(INSTRUCTION_EXIT, times)
 
     @classmethod
-    def IO(self):
-        return INSTRUCTION_IO
+    def IO(self, deviceId=0):
+        ## el id tiene que entrar en el byte del operando (si no, pisaria el opcode)
+        if not 0 <= deviceId <= OPERAND_MASK:
+            raise Exception("Invalid IO device id {id}: must be between 0 and {max}".format(id=deviceId, max=OPERAND_MASK))
+        return INSTRUCTION_IO | deviceId
 
     @classmethod
     def CPU(self, times):
-        return [INSTRUCTION_CPU] * times
+        return InstructionRun(INSTRUCTION_CPU, times)
+
+    @classmethod
+    def opcode(self, instruction):
+        return instruction >> OPERAND_BITS
+
+    @classmethod
+    def operand(self, instruction):
+        return instruction & OPERAND_MASK
 
     @classmethod
     def isEXIT(self, instruction):
-        return INSTRUCTION_EXIT == instruction
+        return OPCODE_EXIT == instruction >> OPERAND_BITS
 
     @classmethod
     def isIO(self, instruction):
-        return INSTRUCTION_IO == instruction
+        return OPCODE_IO == instruction >> OPERAND_BITS
+
+    ## representacion legible de una instruccion codificada
+    @classmethod
+    def mnemonic(self, instruction):
+        opcode = instruction >> OPERAND_BITS
+        if opcode == OPCODE_IO:
+            return "IO({device})".format(device=instruction & OPERAND_MASK)
+        return MNEMONICS.get(opcode, hex(instruction))
+
+    @classmethod
+    def disassemble(self, instructions):
+        return [self.mnemonic(instruction) for instruction in instructions]
 
 
 ##  Estas son la interrupciones soportadas por nuestro Kernel
@@ -44,12 +112,21 @@ TIMEOUT_INTERRUPTION_TYPE = "#TIMEOUT"
 STAT_INTERRUPTION_TYPE = "#STAT"
 PAGE_FAULT_INTERRUPTION_TYPE = "#PAGE_FAULT"
 
+## codigo numerico de cada tipo de interrupcion (su posicion en la lista), usado por el trace
+INTERRUPTION_TYPES = [KILL_INTERRUPTION_TYPE, IO_IN_INTERRUPTION_TYPE, IO_OUT_INTERRUPTION_TYPE, NEW_INTERRUPTION_TYPE,
+                      TIMEOUT_INTERRUPTION_TYPE, STAT_INTERRUPTION_TYPE, PAGE_FAULT_INTERRUPTION_TYPE]
+INTERRUPTION_CODES = {irqType: code for code, irqType in enumerate(INTERRUPTION_TYPES)}
+
 ## emulates an Interrupt request
+## core: nucleo que levanto la interrupcion (las de dispositivos y del kernel vienen del nucleo 0)
 class IRQ:
 
-    def __init__(self, type, parameters = None):
+    __slots__ = ('_type', '_parameters', '_core')
+
+    def __init__(self, type, parameters = None, core = 0):
         self._type = type
         self._parameters = parameters
+        self._core = core
 
     @property
     def parameters(self):
@@ -59,38 +136,62 @@ class IRQ:
     def type(self):
         return self._type
 
+    @property
+    def core(self):
+        return self._core
+
 
 ## emulates the Interrupt Vector Table
+## clock y tracer son los del hardware al que pertenece (para registrar el tick de cada irq)
 class InterruptVector():
 
-    def __init__(self):
+    def __init__(self, clock, tracer):
         self._handlers = dict()
+        self._clock = clock
+        self._tracer = tracer
         self.lock = Lock()
 
     def register(self, interruptionType, interruptionHandler):
         self._handlers[interruptionType] = interruptionHandler
 
     def handle(self, irq):
-        log.logger.info("Handling {type} irq with parameters = {parameters}".format(type=irq.type, parameters=irq.parameters ))
+        log.info("Handling {type} irq with parameters = {parameters}", type=irq.type, parameters=irq.parameters)
+        if self._tracer.enabled:
+            parameter = irq.parameters if isinstance(irq.parameters, int) else -1
+            self._tracer.record(self._clock.currentTick, EVENT_IRQ, NO_PID, INTERRUPTION_CODES.get(irq.type, -1), parameter)
         self.lock.acquire()
         try:
             irqHandler = self._handlers[irq.type]
         except:
            irqHandler = None
-           log.logger.info("No Handler found for irq type: {type}".format(type=irq.type ))
+           log.info("No Handler found for irq type: {type}", type=irq.type)
 
         if not (irqHandler is None):
             irqHandler.execute(irq)
         self.lock.release()
 
 
+## cantidad de ticks "infinita", usada por los subscribers que no tienen eventos pendientes
+NO_EVENT = float('inf')
+
 ## emulates the Internal Clock
 class Clock():
 
-    def __init__(self):
+    def __init__(self, headless=False, eventDriven=False):
         self._subscribers = []
         self._running = False
         self._currentTick = 0
+        self._nextTick = 0
+        ## en modo headless los ticks se ejecutan uno tras otro, sin esperar
+        self._headless = headless
+        ## en modo eventDriven (solo headless) el clock saltea los ticks en los que
+        ## ningun subscriber tiene algo "interesante" para hacer
+        self._eventDriven = eventDriven and headless
+        ## eventos futuros: heap de (tick, orden, callback)
+        self._events = []
+        self._eventCount = count()
+        ## condicion opcional de corte (una funcion sin parametros que retorna un booleano)
+        self._stopCondition = None
 
     def addSubscriber(self, subscriber):
         self._subscribers.append(subscriber)
@@ -98,43 +199,110 @@ class Clock():
     def stop(self):
         self._running = False
 
+    ## registra una condicion de corte, que se evalua al final de cada tick
+    ## (solo corta si no quedan eventos agendados, ej: arribos demorados que todavia no llegaron)
+    def stopWhen(self, condition):
+        self._stopCondition = condition
+
+    def mustStop(self):
+        return (self._stopCondition is not None) and not self._events and self._stopCondition()
+
+    ## agenda un callback (sin parametros) para el comienzo del tick indicado
+    def schedule(self, tickNbr, callback):
+        heappush(self._events, (tickNbr, next(self._eventCount), callback))
+
     def start(self):
         if not self._running:
-            log.logger.info("---- :::: START CLOCK  ::: -----")
+            log.info("---- :::: START CLOCK  ::: -----")
             self._running = True
             t = Thread(target=self.__start)
             t.start()
 
     def __start(self):
-        tickNbr = 0
         while (self._running):
+            self.advance()
+            if self.mustStop():
+                log.info("---- :::: CLOCK stop condition reached at tick: {tickNbr} ::: -----", tickNbr=self._currentTick)
+                self.stop()
+
+    ## ejecuta el proximo tick, o en modo eventDriven saltea de una vez todos los
+    ## ticks hasta el proximo evento (sin pasar de lastTick)
+    def advance(self, lastTick=None):
+        tickNbr = self._nextTick
+        ticks = self.idleTicks(tickNbr, lastTick)
+        if ticks == NO_EVENT or ticks <= 1:
             self.tick(tickNbr)
-            tickNbr += 1
+        else:
+            self.skipTicks(tickNbr, ticks)
+
+    ## cantidad de ticks a partir de tickNbr (sin pasar de lastTick) que se pueden saltear
+    ## a cada subscriber se le pasa el minimo hasta ahora: no necesita mirar mas alla
+    def idleTicks(self, tickNbr, lastTick=None):
+        if not self._eventDriven:
+            return 0
+        ticks = NO_EVENT
+        if self._events:
+            ticks = self._events[0][0] - tickNbr
+        if lastTick is not None:
+            ticks = min(ticks, lastTick - tickNbr + 1)
+        for subscriber in self._subscribers:
+            if ticks <= 1:
+                break
+            if not hasattr(subscriber, 'idleTicks'):
+                return 0
+            ticks = min(ticks, subscriber.idleTicks(ticks))
+        return ticks
+
+    def skipTicks(self, tickNbr, ticks):
+        log.info("        --------------- ticks: {first} to {last} (skipped) ---------------", first=tickNbr, last=tickNbr + ticks - 1)
+        self._currentTick = tickNbr + ticks - 1
+        self._nextTick = tickNbr + ticks
+        for subscriber in self._subscribers:
+            subscriber.skipTicks(ticks)
 
     def tick(self, tickNbr):
         self._currentTick = tickNbr
-        log.logger.info("        --------------- tick: {tickNbr} ---------------".format(tickNbr = tickNbr))
+        self._nextTick = tickNbr + 1
+        log.info("        --------------- tick: {tickNbr} ---------------", tickNbr = tickNbr)
+        ## dispara los eventos agendados para este tick
+        while self._events and self._events[0][0] <= tickNbr:
+            callback = heappop(self._events)[2]
+            callback()
         ## notify all subscriber that a new clock cycle has started
         for subscriber in self._subscribers:
             subscriber.tick(tickNbr)
-        ## wait 1 second and keep looping
-        sleep(1)
+        ## wait 1 second and keep looping (salvo en modo headless)
+        if not self._headless:
+            sleep(1)
 
     def do_ticks(self, times):
-        log.logger.info("---- :::: CLOCK do_ticks: {times} ::: -----".format(times=times))
-        for tickNbr in range(0, times):
-            self.tick(tickNbr)
+        log.info("---- :::: CLOCK do_ticks: {times} ::: -----", times=times)
+        lastTick = self._nextTick + times - 1
+        while self._nextTick <= lastTick:
+            self.advance(lastTick)
+            if self.mustStop():
+                log.info("---- :::: CLOCK stop condition reached at tick: {tickNbr} ::: -----", tickNbr=self._currentTick)
+                break
 
     @property
     def currentTick(self):
         return self._currentTick
 
+    @property
+    def headless(self):
+        return self._headless
+
+    @property
+    def eventDriven(self):
+        return self._eventDriven
+
 ## emulates the main memory (RAM)
+## cada celda es un entero sin signo de 16 bits (una instruccion codificada)
 class Memory():
 
     def __init__(self, size):
         self._size = size
-        self._cells = [''] * size
+        self._cells = array('H', [OPCODE_NOOP]) * size
 
     def write(self, addr, value):
         self._cells[addr] = value
@@ -142,22 +310,192 @@ class Memory():
     def read(self, addr):
         return self._cells[addr]
 
+    ## escribe de una vez una secuencia de celdas a partir de addr (una sola copia de buffer)
+    ## (como las escrituras de a una, falla si el bloque se pasa del final de la memoria)
+    def write_block(self, addr, values):
+        if not isinstance(values, array):
+            values = array('H', values)
+        if addr < 0 or addr + len(values) > self._size:
+            raise IndexError("memory block [{first}, {last}) out of range, memory size is {size}".format(first=addr, last=addr + len(values), size=self._size))
+        self._cells[addr:addr + len(values)] = values
+
+    ## lee de una vez n celdas a partir de addr
+    def read_block(self, addr, n):
+        return self._cells[addr:addr + n]
+
     @property
     def size(self):
         return self._size
 
     def __repr__(self):
-        return tabulate(enumerate(self._cells), tablefmt='psql')
+        return tabulate(enumerate(map(ASM.mnemonic, self._cells)), tablefmt='psql')
         ##return "Memoria = {mem}".format(mem=self._cells)
 
+## emulates los bits que mantiene el MMU por cada frame fisico (compartidos por todos los nucleos)
+## para los algoritmos de seleccion de victima:
+##  referenced: la pagina del frame se accedio desde que se bajo el bit
+##  dirty: el frame no tiene copia al dia fuera de memoria (al desalojarlo hay que escribirlo en swap)
+##  uses: cantidad de accesos desde que se cargo la pagina
+##  lastUse: numero de acceso (contando todos los fetches) del ultimo acceso al frame
+## tiene una entrada por frame (el hardware la redimensiona al fijar el tamaño de frame)
+class FrameFlags():
+
+    def __init__(self, frames):
+        self.resize(frames)
+        self._accesses = 0
+
+    ## cambia la cantidad de frames (los flags anteriores se descartan)
+    def resize(self, frames):
+        self._referenced = bytearray(frames)
+        self._dirty = bytearray(frames)
+        self._uses = array('Q', [0]) * frames
+        self._lastUse = array('Q', [0]) * frames
+
+    @property
+    def frames(self):
+        return len(self._referenced)
+
+    ## registra "times" accesos seguidos al frame
+    def reference(self, frameId, times=1):
+        self._accesses += times
+        self._referenced[frameId] = 1
+        self._uses[frameId] += times
+        self._lastUse[frameId] = self._accesses
+
+    ## se cargo una pagina en el frame: los contadores arrancan de cero
+    def loaded(self, frameId, dirty=False):
+        self._referenced[frameId] = 0
+        self._dirty[frameId] = 1 if dirty else 0
+        self._uses[frameId] = 0
+        self._lastUse[frameId] = self._accesses
+
+    def isReferenced(self, frameId):
+        return self._referenced[frameId] == 1
+
+    def clearReferenced(self, frameId):
+        self._referenced[frameId] = 0
+
+    def isDirty(self, frameId):
+        return self._dirty[frameId] == 1
+
+    def setDirty(self, frameId):
+        self._dirty[frameId] = 1
+
+    def uses(self, frameId):
+        return self._uses[frameId]
+
+    def lastUse(self, frameId):
+        return self._lastUse[frameId]
+
+    @property
+    def accesses(self):
+        return self._accesses
+
+
+## politicas de reemplazo de la TLB
+TLB_LRU = "LRU"
+TLB_RANDOM = "RANDOM"
+
+## emulates the Translation Lookaside Buffer (TLB)
+## es una cache acotada de (pagina -> frame) organizada en conjuntos:
+## cada pagina solo puede estar en el conjunto (pageId % cantidad de conjuntos),
+## que tiene lugar para "associativity" entradas
+class TLB():
+
+    def __init__(self, entries=16, associativity=None, replacement=TLB_LRU):
+        if associativity is None:
+            ## totalmente asociativa: un solo conjunto con todas las entradas
+            associativity = entries
+        ## los conjuntos tienen que repartirse todas las entradas (la capacidad es exactamente entries)
+        if not 1 <= associativity <= entries or entries % associativity != 0:
+            raise Exception("Invalid TLB geometry: {entries} entries can't be split in sets of {ways}".format(entries=entries, ways=associativity))
+        self._entries = entries
+        self._associativity = associativity
+        self._replacement = replacement
+        self._sets = [OrderedDict() for _ in range(entries // associativity)]
+        self._hits = 0
+        self._misses = 0
+
+    def _setOf(self, pageId):
+        return self._sets[pageId % len(self._sets)]
+
+    ## busca el frame de la pagina, contando hits y misses
+    def lookup(self, pageId):
+        entries = self._setOf(pageId)
+        frameId = entries.get(pageId)
+        if frameId is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+            if self._replacement == TLB_LRU:
+                entries.move_to_end(pageId)
+        return frameId
+
+    ## busca el frame de la pagina sin modificar la TLB ni los contadores
+    def peek(self, pageId):
+        return self._setOf(pageId).get(pageId)
+
+    ## registra "times" hits sobre la ultima pagina buscada (ya esta al final de su conjunto)
+    def recordHits(self, times):
+        self._hits += times
+
+    def insert(self, pageId, frameId):
+        entries = self._setOf(pageId)
+        if (pageId not in entries) and len(entries) >= self._associativity:
+            if self._replacement == TLB_LRU:
+                entries.popitem(last=False)
+            else:
+                del entries[choice(list(entries))]
+        entries[pageId] = frameId
+
+    def invalidate(self, pageId):
+        self._setOf(pageId).pop(pageId, None)
+
+    def flush(self):
+        for entries in self._sets:
+            entries.clear()
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def hitRatio(self):
+        accesses = self._hits + self._misses
+        if accesses == 0:
+            return 0
+        return self._hits / accesses
+
+    def resetStats(self):
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self):
+        return "TLB(entries={entries}, associativity={ways}, {repl}, hits={hits}, misses={misses})".format(
+            entries=self._entries, ways=self._associativity, repl=self._replacement, hits=self._hits, misses=self._misses)
+
+
 ## emulates the Memory Management Unit (MMU)
+## traduce usando la TLB y, ante un miss, recorre la page table del proceso actual
 class MMU():
 
-    def __init__(self, memory):
+    def __init__(self, memory, tlb, interruptVector, frameFlags, core=0):
         self._memory = memory
+        self._interruptVector = interruptVector
+        self._frameFlags = frameFlags
+        self._core = core
+        self._asid = 0
+        self._references = None
+        self._pageFaults = 0
         self._frameSize = 0
+        self._cpuPage = array('H')
         self._limit = 999
-        self._tlb = dict()
+        self._tlb = tlb
+        self._pageTable = dict()
 
     @property
     def limit(self):
@@ -174,57 +512,160 @@ class MMU():
     @frameSize.setter
     def frameSize(self, frameSize):
         self._frameSize = frameSize
+        ## una pagina de solo instrucciones CPU (para comparar paginas enteras de una vez)
+        self._cpuPage = array('H', [INSTRUCTION_CPU]) * frameSize
+
+    @property
+    def tlb(self):
+        return self._tlb
+
+    @property
+    def frameFlags(self):
+        return self._frameFlags
+
+    ## identificador del espacio de direcciones en uso (el pid del proceso cargado)
+    @property
+    def asid(self):
+        return self._asid
+
+    @asid.setter
+    def asid(self, asid):
+        self._asid = asid
+
+    ## references es un array('Q') donde se agrega cada pagina accedida como (asid << 32 | pagina),
+    ## o None para no registrar nada
+    def recordReferences(self, references):
+        self._references = references
+
+    ## cantidad de page faults levantados
+    @property
+    def pageFaults(self):
+        return self._pageFaults
+
+    ## page table del proceso en ejecucion (se usa por referencia, no se copia)
+    @property
+    def pageTable(self):
+        return self._pageTable
+
+    def setPageTable(self, pageTable):
+        self._pageTable = pageTable
 
     def resetTLB(self):
-        self._tlb = dict()
+        self._tlb.flush()
 
     def setPageFrame(self, pageId, frameId):
-        self._tlb[pageId] = frameId
+        self._tlb.insert(pageId, frameId)
+
+    ## la pagina dejo de estar en memoria: si es del proceso actual se saca de la TLB
+    def invalidate(self, pageTable, pageId):
+        if pageTable is self._pageTable:
+            self._tlb.invalidate(pageId)
+
+    ## cantidad de instrucciones CPU consecutivas a partir de logicalAddress (sin pasar de horizon)
+    ## cuyas paginas estan cargadas: se pueden ejecutar sin interrupciones
+    ## recorre de a pagina, comparando cada bloque contra una pagina de solo instrucciones CPU
+    def cpuRunLength(self, logicalAddress, horizon=NO_EVENT):
+        lastAddress = min(self._limit, logicalAddress + horizon - 1)
+        run = 0
+        while logicalAddress <= lastAddress:
+            pageId = logicalAddress // self._frameSize
+            frameId = self._pageTable.get(pageId)
+            if frameId is None:
+                break
+            offset = logicalAddress % self._frameSize
+            cells = int(min(self._frameSize - offset, lastAddress - logicalAddress + 1))
+            block = self._memory.read_block(self._frameSize * frameId + offset, cells)
+            if block != (self._cpuPage if cells == self._frameSize else self._cpuPage[:cells]):
+                for cell in block:
+                    if cell != INSTRUCTION_CPU:
+                        break
+                    run += 1
+                break
+            run += cells
+            logicalAddress += cells
+        return run
+
+    ## registra en la TLB y en los flags de los frames los accesos de "times" fetches
+    ## salteados a partir de logicalAddress (como si se hubieran hecho uno por uno:
+    ## por cada pagina un lookup, que ante un miss la inserta, y el resto hits)
+    def skipFetches(self, logicalAddress, times):
+        firstPage = logicalAddress // self._frameSize
+        lastPage = (logicalAddress + times - 1) // self._frameSize
+        end = logicalAddress + times
+        for pageId in range(firstPage, lastPage + 1):
+            accesses = min(end, (pageId + 1) * self._frameSize) - max(logicalAddress, pageId * self._frameSize)
+            frameId = self._tlb.lookup(pageId)
+            if frameId is None:
+                frameId = self._pageTable[pageId]
+                self._tlb.insert(pageId, frameId)
+            self._tlb.recordHits(accesses - 1)
+            self._frameFlags.reference(frameId, accesses)
+            if self._references is not None:
+                self._references.extend(repeat(self._asid << 32 | pageId, accesses))
 
     def fetch(self,  logicalAddress):
+        physicalAddress = self.translate(logicalAddress)
+        #
+        # obtenemos la instrucción alocada en esa direccion
+        return self._memory.read(physicalAddress)
+
+    ## escribe value en la direccion logica: ademas de referenciado, el frame queda sucio
+    ## (al desalojar la pagina hay que guardarla en swap)
+    def write(self, logicalAddress, value):
+        physicalAddress = self.translate(logicalAddress)
+        self._frameFlags.setDirty(physicalAddress // self._frameSize)
+        self._memory.write(physicalAddress, value)
+
+    ## direccion fisica de la direccion logica (resolviendo el page fault si la pagina no esta cargada)
+    def translate(self, logicalAddress):
         if (logicalAddress > self._limit):
             raise Exception("Invalid Address,  {logicalAddress} is higher than process limit: {limit}".format(limit = self._limit, logicalAddress = logicalAddress))
         #
         # calculamos la pagina y el offset correspondiente a la direccion logica recibida 
         pageId = logicalAddress // self._frameSize
         offset = logicalAddress % self._frameSize
-        log.logger.info("page: {id} - offset: {off}".format(id=pageId, off=offset))
+        log.info("page: {id} - offset: {off}", id=pageId, off=offset)
         #
-        # buscamos la direccion Base del frame donde esta almacenada la pagina
-        try:
-            frameId = self._tlb[pageId]
-        except:
-            frameId = None
-
-        if frameId is None :
-            pageFaultIRQ = IRQ(PAGE_FAULT_INTERRUPTION_TYPE, pageId)
-            HARDWARE.interruptVector.handle(pageFaultIRQ)
-            # una vez resuelto el pageFault, volvemos a buscar en la Page Table
-            # ya que la pagina, ahora debe estar cargada si o si
-            frameId = self._tlb[pageId]
-
-
-        ### setear los flags manejados por el MMU para los algoritmos de seleccion de victima
+        # buscamos la direccion Base del frame donde esta almacenada la pagina:
+        # primero en la TLB y si no esta, en la page table del proceso
+        frameId = self._tlb.lookup(pageId)
+        if frameId is None:
+            frameId = self._pageTable.get(pageId)
+
+            if frameId is None :
+                self._pageFaults += 1
+                pageFaultIRQ = IRQ(PAGE_FAULT_INTERRUPTION_TYPE, pageId, self._core)
+                self._interruptVector.handle(pageFaultIRQ)
+                # una vez resuelto el pageFault, volvemos a buscar en la Page Table
+                # ya que la pagina, ahora debe estar cargada si o si
+                frameId = self._pageTable[pageId]
+
+            self._tlb.insert(pageId, frameId)
 
+        #
+        # seteamos los flags manejados por el MMU para los algoritmos de seleccion de victima
+        self._frameFlags.reference(frameId)
+        if self._references is not None:
+            self._references.append(self._asid << 32 | pageId)
 
         #
         ##calculamos la direccion fisica resultante
         frameBaseDir  = self._frameSize * frameId
-        physicalAddress = frameBaseDir + offset
-
-        #
-        # obtenemos la instrucción alocada en esa direccion
-        return self._memory.read(physicalAddress)
+        return frameBaseDir + offset
 
 
 ## emulates the main Central Processor Unit
 class Cpu():
 
-    def __init__(self, mmu, interruptVector):
+    def __init__(self, mmu, interruptVector, core=0):
         self._mmu = mmu
         self._interruptVector = interruptVector
+        self._core = core
+        ## el STAT de cada tick es siempre igual: se crea una sola vez y se reusa
+        self._statIRQ = IRQ(STAT_INTERRUPTION_TYPE, None, core)
         self._pc = -1
         self._ir = None
+        self._opcode = OPCODE_NOOP
         self._enable_stats = False
 
 
@@ -235,34 +676,53 @@ class Cpu():
             self._decode()
             self._execute()
         else:
-            log.logger.info("cpu - NOOP")
+            log.info("cpu - NOOP")
+
+    ## ticks en los que el CPU solo ejecutaria instrucciones CPU (sin interrupciones)
+    ## (no mira mas alla de horizon)
+    def idleTicks(self, horizon=NO_EVENT):
+        if not self.isBusy():
+            return NO_EVENT
+        return self._mmu.cpuRunLength(self._pc, horizon)
+
+    def skipTicks(self, ticks):
+        if self._enable_stats:
+            ## un solo STAT por todos los ticks salteados (en todos el estado es el mismo)
+            statsIRQ = IRQ(STAT_INTERRUPTION_TYPE, ticks, self._core)
+            self._interruptVector.handle(statsIRQ)
+        if self.isBusy():
+            self._mmu.skipFetches(self._pc, ticks)
+            self._pc += ticks
 
     def _fetch(self):
         self._ir = self._mmu.fetch(self._pc)
         self._pc += 1
 
     def _decode(self):
-        ## decode no hace nada en este caso
-        pass
+        ## separa el opcode del operando de la instruccion
+        self._opcode = self._ir >> OPERAND_BITS
 
     def _stats(self):
         if self._enable_stats:
-            statsIRQ = IRQ(STAT_INTERRUPTION_TYPE)
-            self._interruptVector.handle(statsIRQ)
+            self._interruptVector.handle(self._statIRQ)
 
     def _execute(self):
-        if ASM.isEXIT(self._ir):
-            killIRQ = IRQ(KILL_INTERRUPTION_TYPE)
+        if self._opcode == OPCODE_EXIT:
+            killIRQ = IRQ(KILL_INTERRUPTION_TYPE, None, self._core)
             self._interruptVector.handle(killIRQ)
-        elif ASM.isIO(self._ir):
-            ioInIRQ = IRQ(IO_IN_INTERRUPTION_TYPE, self._ir)
+        elif self._opcode == OPCODE_IO:
+            ioInIRQ = IRQ(IO_IN_INTERRUPTION_TYPE, self._ir, self._core)
             self._interruptVector.handle(ioInIRQ)
         else:
-            log.logger.info("cpu - Exec: {instr}, PC={pc}".format(instr=self._ir, pc=self._pc))
+            log.info("cpu - Exec: {instr}, PC={pc}", instr=log.Lazy(ASM.mnemonic, self._ir), pc=self._pc)
 
     def isBusy(self):
         return self._pc > -1
 
+    @property
+    def core(self):
+        return self._core
+
     @property
     def pc(self):
         return self._pc
@@ -285,9 +745,11 @@ class Cpu():
 ## emulates an Input/output device of the Hardware
 class AbstractIODevice():
 
-    def __init__(self, deviceId, deviceTime):
+    def __init__(self, deviceId, deviceTime, interruptVector):
         self._deviceId = deviceId
         self._deviceTime = deviceTime
+        self._interruptVector = interruptVector
+        self._ioOutIRQ = IRQ(IO_OUT_INTERRUPTION_TYPE, deviceId)
         self._busy = False
 
     @property
@@ -317,15 +779,24 @@ class AbstractIODevice():
             if (self._ticksCount > self._deviceTime):
                 ## operation execution has finished
                 self._busy = False
-                ioOutIRQ = IRQ(IO_OUT_INTERRUPTION_TYPE, self._deviceId)
-                HARDWARE.interruptVector.handle(ioOutIRQ)
+                self._interruptVector.handle(self._ioOutIRQ)
             else:
-                log.logger.info("device {deviceId} - Busy: {ticksCount} of {deviceTime}".format(deviceId = self.deviceId, ticksCount = self._ticksCount, deviceTime = self._deviceTime))
+                log.info("device {deviceId} - Busy: {ticksCount} of {deviceTime}", deviceId = self.deviceId, ticksCount = self._ticksCount, deviceTime = self._deviceTime)
+
+    ## ticks que faltan hasta que la operacion en curso termine
+    def idleTicks(self, horizon=NO_EVENT):
+        if (self._busy):
+            return self._deviceTime - self._ticksCount
+        return NO_EVENT
+
+    def skipTicks(self, ticks):
+        if (self._busy):
+            self._ticksCount += ticks
 
 
 class PrinterIODevice(AbstractIODevice):
-    def __init__(self):
-        super(PrinterIODevice, self).__init__("Printer", 3)
+    def __init__(self, interruptVector):
+        super(PrinterIODevice, self).__init__("Printer", 3, interruptVector)
 
 
 class Timer:
@@ -333,6 +804,7 @@ class Timer:
     def __init__(self, cpu, interruptVector):
         self._cpu = cpu
         self._interruptVector = interruptVector
+        self._timeoutIRQ = IRQ(TIMEOUT_INTERRUPTION_TYPE, None, cpu.core)
         self._tickCount = 0    # cantidad de de ciclos “ejecutados” por el proceso actual
         self._active = False    # por default esta desactivado
         self._quantum = 0   # por default esta desactivado
@@ -340,13 +812,24 @@ class Timer:
     def tick(self, tickNbr):
         if self._active and (self._tickCount >= self._quantum) and self._cpu.isBusy():
             # se “cumplio” el limite de ejecuciones
-            timeoutIRQ = IRQ(TIMEOUT_INTERRUPTION_TYPE)
-            self._interruptVector.handle(timeoutIRQ)
+            self._interruptVector.handle(self._timeoutIRQ)
 
         # registro que el proceso en CPU corrio un ciclo mas
         self._tickCount += 1
         self._cpu.tick(tickNbr)
 
+    ## el quantum que le queda al proceso acota lo que el CPU tiene que mirar
+    def idleTicks(self, horizon=NO_EVENT):
+        if self._active and self._cpu.isBusy():
+            horizon = min(horizon, self._quantum - self._tickCount)
+            if horizon <= 0:
+                return horizon
+        return self._cpu.idleTicks(horizon)
+
+    def skipTicks(self, ticks):
+        self._tickCount += ticks
+        self._cpu.skipTicks(ticks)
+
     def reset(self):
            self._tickCount = 0
 
@@ -354,40 +837,96 @@ class Timer:
     def quantum(self):
         return self._quantum
 
+    ## quantum None desactiva el timer
     @quantum.setter
     def quantum(self, quantum):
-        self._active = True
+        self._active = quantum is not None
         self._quantum = quantum
 
 
+## un nucleo: su CPU, su MMU (con su TLB) y su timer
+## todos los nucleos comparten la memoria y el interrupt vector
+class Core():
+
+    def __init__(self, coreId, memory, interruptVector, tlb, frameFlags):
+        self._id = coreId
+        self._mmu = MMU(memory, tlb, interruptVector, frameFlags, coreId)
+        self._cpu = Cpu(self._mmu, interruptVector, coreId)
+        self._timer = Timer(self._cpu, interruptVector)
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def cpu(self):
+        return self._cpu
+
+    @property
+    def mmu(self):
+        return self._mmu
+
+    @property
+    def timer(self):
+        return self._timer
+
+    def __repr__(self):
+        return "Core({id}, {cpu})".format(id=self._id, cpu=self._cpu)
+
+
 ## emulates the Hardware that were the Operative System run
+## cada instancia es una maquina independiente (se pueden tener varias en el mismo proceso),
+## el kernel recibe la suya; tracer es donde se registran sus eventos (por default uno propio, desactivado)
 class Hardware():
 
+    def __init__(self, tracer=None):
+        self._tracer = tracer if tracer is not None else Tracer()
+        self._references = None
+
     ## Setup our hardware
-    def setup(self, memorySize):
+    ## headless=True hace que el clock corra los ticks sin esperar entre ellos
+    ## eventDriven=True (junto con headless) saltea los ticks sin eventos
+    ## tlbEntries, tlbAssociativity (None = totalmente asociativa) y tlbReplacement configuran la TLB
+    ## cores es la cantidad de nucleos (cada uno con su CPU, MMU, TLB y timer)
+    def setup(self, memorySize, headless=False, eventDriven=False, tlbEntries=16, tlbAssociativity=None, tlbReplacement=TLB_LRU, cores=1):
         ## add the components to the "motherboard"
         self._memory = Memory(memorySize)
-        self._interruptVector = InterruptVector()
-        self._clock = Clock()
-        self._ioDevice = PrinterIODevice()
-        self._mmu = MMU(self._memory)
-        self._cpu = Cpu(self._mmu, self._interruptVector)
-        self._timer = Timer(self._cpu, self._interruptVector)
+        self._clock = Clock(headless, eventDriven)
+        self._interruptVector = InterruptVector(self._clock, self._tracer)
+        self._ioDevice = PrinterIODevice(self._interruptVector)
+        ## una entrada por frame: se dimensiona en setFrameSize, cuando se conoce el tamaño de frame
+        self._frameFlags = FrameFlags(0)
+        self._cores = [Core(coreId, self._memory, self._interruptVector, TLB(tlbEntries, tlbAssociativity, tlbReplacement), self._frameFlags) for coreId in range(cores)]
+        ## cpu, mmu y timer son los del nucleo 0
+        self._mmu = self._cores[0].mmu
+        self._cpu = self._cores[0].cpu
+        self._timer = self._cores[0].timer
         self._clock.addSubscriber(self._ioDevice)
-        self._clock.addSubscriber(self._timer)
+        for core in self._cores:
+            self._clock.addSubscriber(core.timer)
+
+    ## tamaño de frame de todos los MMU (los flags pasan a tener una entrada por frame)
+    def setFrameSize(self, frameSize):
+        self._frameFlags.resize(self._memory.size // frameSize)
+        for core in self._cores:
+            core.mmu.frameSize = frameSize
 
     def switchOn(self):
-        log.logger.info(" ---- SWITCH ON ---- ")
+        log.info(" ---- SWITCH ON ---- ")
         return self.clock.start()
 
     def switchOff(self):
         self.clock.stop()
-        log.logger.info(" ---- SWITCH OFF ---- ")
+        log.info(" ---- SWITCH OFF ---- ")
 
     @property
     def cpu(self):
         return self._cpu
 
+    @property
+    def cores(self):
+        return self._cores
+
     @property
     def clock(self):
         return self._clock
@@ -400,6 +939,22 @@ class Hardware():
     def memory(self):
         return self._memory
 
+    @property
+    def frameFlags(self):
+        return self._frameFlags
+
+    ## empieza a registrar en todos los MMU las paginas accedidas (ver MMU.recordReferences)
+    def recordReferences(self):
+        self._references = array('Q')
+        for core in self._cores:
+            core.mmu.recordReferences(self._references)
+        return self._references
+
+    ## paginas accedidas desde recordReferences (o None si no se registran)
+    @property
+    def references(self):
+        return self._references
+
     @property
     def mmu(self):
         return self._mmu
@@ -412,10 +967,15 @@ class Hardware():
     def timer(self):
         return self._timer
 
+    @property
+    def tracer(self):
+        return self._tracer
+
     def __repr__(self):
         return "HARDWARE state {cpu}\n{mem}".format(cpu=self._cpu, mem=self._memory)
 
 ### HARDWARE is a global variable
 ### can be access from any
-HARDWARE = Hardware()
+### (es el hardware por default del Kernel, y registra sus eventos en el TRACE global)
+HARDWARE = Hardware(TRACE)
 
@@ -2,10 +2,38 @@ import logging
 
 logger = logging.getLogger()
 
-def setupLogger():
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+
+def setupLogger(level=logging.DEBUG):
     ## Configure Logger
     handler = logging.StreamHandler()
     formatter = logging.Formatter('%(message)s')
     handler.setFormatter(formatter)
     logger.addHandler(handler)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(level)
+
+## indica si los mensajes de ese nivel se van a mostrar
+def isEnabled(level=logging.INFO):
+    return logger.isEnabledFor(level)
+
+## log "perezoso": message es un template de str.format que solo se arma
+## (junto con los repr de sus parametros) si el nivel esta habilitado
+def info(message, *args, **kwargs):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(message.format(*args, **kwargs))
+
+def debug(message, *args, **kwargs):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message.format(*args, **kwargs))
+
+## parametro de log que se calcula recien cuando se arma el mensaje
+## ej: log.info("instr: {}", log.Lazy(ASM.disassemble, instructions))
+class Lazy():
+
+    def __init__(self, function, *args):
+        self._function = function
+        self._args = args
+
+    def __format__(self, spec):
+        return format(self._function(*self._args), spec)
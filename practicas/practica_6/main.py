@@ -11,11 +11,16 @@ if __name__ == '__main__':
     DESIGNER.title('Starting emulator')
 
     ## setup our hardware and set memory size to 25 "cells"
+    ## (con HARDWARE.setup(12, headless=True) los ticks corren sin esperar 1 segundo,
+    ##  y agregando eventDriven=True ademas se saltean los ticks sin eventos;
+    ##  con cores=N hay N nucleos y el Kernel recibe una lista con un scheduler por nucleo)
     HARDWARE.setup(12)
 
     ## Switch on computer
     HARDWARE.switchOn()
     HARDWARE._cpu.enable_stats = True
+    # imprime el diagrama de gantt en cada tick (con DESIGNER.printGantt() se imprime a pedido)
+    DESIGNER.setRefresh(1)
 
     ## new create the Operative System Kernel
     # "booteamos" el sistema operativo
@@ -28,10 +33,36 @@ if __name__ == '__main__':
     #   PriorityScheduler(False, 0) --Poner True y un número para activar aging, puede inicializar sin parametros
     #   PreemtivePriorityScheduler(False, 0)
     #   RoundRobin(3) --Poner un valor de quantum para inicializar o dejarlo en 3.
+    #   MultilevelFeedbackQueue([2, 4, None], 50) --Quantum por nivel (None = sin quantum) y cada cuantos ticks vuelven todos al nivel 0
+    #   CompletelyFairScheduler(20, 2) --Latencia objetivo (ticks a repartir entre los listos) y quantum minimo
+    #   ShortestJobFirst(0.5, 5) / ShortestRemainingTimeFirst(0.5, 5) --Alpha del promedio y rafaga estimada inicial (oracle=True lee las rafagas del programa)
     scheduler = FCFSScheduler()
+    #Elegir algoritmo de seleccion de victima:
+    #   KillFifo(), KillLRU(), KillClock(), KillEnhancedSecondChance(), KillLFU()
+    #   KillNRU(10) --Cada cuantos ticks se bajan los bits de referencia
     killAlgorithm = KillFifo()
     kernel = Kernel(scheduler, frames, killAlgorithm)
 
+    # opcional: cuotas de frames por proceso (sin esto el reemplazo es global, sin cuotas)
+    #   ResidentSetPolicy(2) --Asignacion fija de frames por proceso
+    #   WorkingSetPolicy(20, 2) --Ventana del working set (en accesos a memoria) y minimo de frames
+    #   PageFaultFrequencyPolicy(4, 16, 2) --Accesos entre page faults para sumar / sacar frames, y minimo
+    #   local=False permite sacarle frames a otro proceso cuando no hay libres
+    # kernel.memoryManager.setResidentSet(WorkingSetPolicy(20, 2))
+
+    # opcional: en cada page fault cargar tambien las paginas siguientes si hay frames libres
+    #   ReadAhead(2, 8) --Ventana inicial y maxima (se agranda si se usan las paginas anticipadas, adaptive=False la deja fija)
+    # kernel.memoryManager.setReadAhead(ReadAhead(2, 8))
+
+    # opcional: trace binario de eventos (irqs, context switches, page faults, swap, IO)
+    # TRACE.enable(65536, "trace.bin")   -> se lee con tracer.readTrace("trace.bin")
+
+    # opcional: sacar de la pcbTable los procesos que terminan (quedan en la lista indicada)
+    # kernel.pcbTable.setArchive([])
+
+    # opcional: detener el clock cuando todos los procesos terminaron
+    # HARDWARE.clock.stopWhen(kernel.pcbTable.allTerminated)
+
     # Ahora vamos a intentar ejecutar 3 programas a la vez
     ##################
     
@@ -0,0 +1,93 @@
+import numpy as np
+from designer import ABSENT_CODE, STATE_CODES
+
+## Metricas de planificacion calculadas a partir del historial de estados
+## registrado por el GanttRecorder (un codigo de estado por pcb por tick).
+## Requiere numpy; el resto del emulador no lo usa.
+
+READY_CODE = STATE_CODES["READY"]
+RUNNING_CODE = STATE_CODES["RUNNING"]
+WAITING_CODE = STATE_CODES["WAITING"]
+TERMINATED_CODE = STATE_CODES["TERMINATED"]
+
+PERCENTILES = [50, 90, 99]
+
+## columnas de la tabla por proceso
+PROCESS_FIELDS = ['pid', 'arrival', 'firstRun', 'completion', 'cpu', 'ready', 'io', 'waiting', 'turnaround', 'response']
+
+
+# primer indice de cada fila donde mask es verdadero (o -1 si no hay ninguno)
+def _first(mask):
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+# metricas de cada proceso, como un diccionario de arrays (uno por campo de PROCESS_FIELDS)
+# - waiting: ticks en la readyQ
+# - turnaround: ticks desde el arribo hasta terminar
+# - response: ticks desde el arribo hasta la primera vez en CPU
+# los tiempos de un proceso que no termino (o no corrio) quedan en -1
+def processMetrics(recorder):
+    pids = recorder.pids()
+    result = {field: np.full(len(pids), -1, dtype=np.int64) for field in PROCESS_FIELDS}
+    result['pid'][:] = pids
+    if not pids or not recorder.columns:
+        return _derived(result)
+    ticks = np.frombuffer(recorder.ticks, dtype=np.int64)
+    # una fila por pcb, una columna por tick
+    states = np.vstack([np.frombuffer(recorder.states(pid), dtype=np.uint8) for pid in pids])
+    arrival = _first(states != ABSENT_CODE)
+    completion = _first(states == TERMINATED_CODE)
+    firstRun = _first(states == RUNNING_CODE)
+    arrived = arrival >= 0
+    result['arrival'] = np.where(arrived, ticks[arrival], -1)
+    result['cpu'] = np.where(arrived, np.count_nonzero(states == RUNNING_CODE, axis=1), -1)
+    result['ready'] = np.where(arrived, np.count_nonzero(states == READY_CODE, axis=1), -1)
+    result['io'] = np.where(arrived, np.count_nonzero(states == WAITING_CODE, axis=1), -1)
+    result['firstRun'] = np.where(firstRun >= 0, ticks[firstRun], -1)
+    result['completion'] = np.where(completion >= 0, ticks[completion], -1)
+    return _derived(result)
+
+
+# completa los tiempos que salen de los otros campos
+def _derived(result):
+    finished = result['completion'] >= 0
+    started = result['firstRun'] >= 0
+    result['waiting'] = np.where(finished, result['ready'], -1)
+    result['turnaround'] = np.where(finished, result['completion'] - result['arrival'], -1)
+    result['response'] = np.where(started, result['firstRun'] - result['arrival'], -1)
+    return result
+
+
+# promedio y percentiles de los valores validos (>= 0)
+def _stats(values):
+    values = values[values >= 0]
+    stats = {'mean': float(values.mean()) if values.size else 0.0}
+    percentiles = np.percentile(values, PERCENTILES) if values.size else np.zeros(len(PERCENTILES))
+    for p, value in zip(PERCENTILES, percentiles):
+        stats['p{}'.format(p)] = float(value)
+    return stats
+
+
+# metricas agregadas de toda la corrida
+# cores: cantidad de CPUs, para calcular la utilizacion
+def summary(recorder, cores=1, processes=None):
+    if processes is None:
+        processes = processMetrics(recorder)
+    columns = recorder.columns
+    finished = int(np.count_nonzero(processes['completion'] >= 0))
+    busy = int(processes['cpu'][processes['cpu'] > 0].sum())
+    return {
+        'ticks': columns,
+        'processes': len(processes['pid']),
+        'finished': finished,
+        'utilization': busy / (columns * cores) if columns else 0.0,
+        'throughput': finished / columns if columns else 0.0,
+        'waiting': _stats(processes['waiting']),
+        'turnaround': _stats(processes['turnaround']),
+        'response': _stats(processes['response']),
+    }
+
+
+# tabla (lista de renglones) con las metricas por proceso, lista para imprimir
+def processRows(processes):
+    return [list(row) for row in zip(*[processes[field].tolist() for field in PROCESS_FIELDS])]
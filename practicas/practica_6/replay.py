@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+import csv
+import numpy as np
+from heapq import heappush, heappop
+from tabulate import tabulate
+from hardware import *
+from so import *
+from designer import LoggerDesign
+import sweep
+
+## Banco de prueba de los algoritmos de seleccion de victima: se registra la secuencia de paginas
+## accedidas en una corrida (MMU.recordReferences) y se reproduce fuera del emulador, sin clock,
+## CPU ni kernel, contra cada KillAlgorithm y contra el optimo de Belady (OPT),
+## para varias cantidades de frames.
+## Requiere numpy (como metrics).
+##
+##  references = recordRun(sweep.grid(scheduler=['rr'], workload=['mixed'])[0])
+##  rows = benchmark(references, [2, 4, 8, 16])
+##  printTable(rows)
+
+## columnas de la tabla de resultados
+BENCHMARK_FIELDS = ['policy', 'frames', 'references', 'faults', 'hitRatio']
+
+
+# corre la configuracion (ver sweep.grid) registrando las paginas accedidas
+# y retorna la secuencia como un array de numpy (cada referencia es pid << 32 | pagina)
+def recordRun(config):
+    hardware = Hardware()
+    hardware.setup(config['memorySize'], headless=True, eventDriven=True, cores=config['cores'])
+    references = hardware.recordReferences()
+    sweep.simulate(config, hardware, LoggerDesign()).shutdown()
+    return np.frombuffer(references, dtype=np.uint64)
+
+
+# junta las referencias consecutivas a la misma pagina (despues de la primera siempre son hits):
+# retorna las paginas de cada tramo (renumeradas desde 0) y la cantidad de referencias de cada uno
+def compress(references):
+    references = np.asarray(references)
+    if references.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], references[1:] != references[:-1])))
+    times = np.diff(np.append(starts, references.size))
+    _, pages = np.unique(references[starts], return_inverse=True)
+    return pages.astype(np.int64), times.astype(np.int64)
+
+
+# para cada posicion, la posicion de la proxima referencia a la misma pagina (o len(pages) si no hay)
+def nextUses(pages):
+    n = pages.size
+    order = np.lexsort((np.arange(n), pages))
+    following = np.full(n, n, dtype=np.int64)
+    same = pages[order[1:]] == pages[order[:-1]]
+    following[order[:-1][same]] = order[1:][same]
+    return following
+
+
+## lo que usan los KillAlgorithm del hardware (flags de los frames y clock)
+## y del pcb (la page table de la que sacan la victima) durante la reproduccion
+class ReplayClock():
+
+    def __init__(self):
+        self.currentTick = 0
+
+class ReplayMachine():
+
+    def __init__(self, frames):
+        self._frameFlags = FrameFlags(frames)
+        self._clock = ReplayClock()
+        self._pageTable = dict()
+
+    @property
+    def frameFlags(self):
+        return self._frameFlags
+
+    @property
+    def clock(self):
+        return self._clock
+
+    @property
+    def pageTable(self):
+        return self._pageTable
+
+    def removePageFromTable(self, page):
+        del self._pageTable[page]
+
+
+# cantidad de page faults de killerClass con "frames" frames sobre la secuencia comprimida
+# (el tick que ve el algoritmo es la posicion de la referencia en la secuencia original)
+def replayPolicy(killerClass, pages, times, frames):
+    machine = ReplayMachine(frames)
+    killer = killerClass()
+    killer.setHardware(machine)
+    flags = machine.frameFlags
+    pageTable = machine.pageTable
+    clock = machine.clock
+    freeFrames = list(range(frames - 1, -1, -1))
+    ticks = (np.cumsum(times) - times).tolist()
+    faults = 0
+    for page, count, tick in zip(pages.tolist(), times.tolist(), ticks):
+        frame = pageTable.get(page)
+        if frame is None:
+            faults += 1
+            clock.currentTick = tick
+            frame = freeFrames.pop() if freeFrames else killer.nextToKill()[2]
+            flags.loaded(frame)
+            pageTable[page] = frame
+            killer.newFrame(machine, page, frame)
+        flags.reference(frame, count)
+    return faults
+
+
+# cantidad de page faults del optimo de Belady: desaloja la pagina que mas tarda en volver a usarse
+def replayOPT(pages, frames):
+    resident = dict()    # pagina -> posicion de su proximo uso
+    heap = []            # (-proximo uso, pagina), con entradas viejas que se descartan al sacarlas
+    faults = 0
+    for page, nextUse in zip(pages.tolist(), nextUses(pages).tolist()):
+        if page not in resident:
+            faults += 1
+            if len(resident) >= frames:
+                while True:
+                    negNextUse, victim = heappop(heap)
+                    if resident.get(victim) == -negNextUse:
+                        break
+                del resident[victim]
+        resident[page] = nextUse
+        heappush(heap, (-nextUse, page))
+    return faults
+
+
+# reproduce la secuencia contra cada algoritmo (por default los de sweep.KILLERS) y OPT
+# para cada cantidad de frames, y retorna un renglon por (algoritmo, frames)
+def benchmark(references, frames, killers=None):
+    killers = sweep.KILLERS if killers is None else killers
+    pages, times = compress(references)
+    total = int(times.sum())
+    rows = []
+    for frameCount in frames:
+        results = [(name, replayPolicy(killerClass, pages, times, frameCount)) for name, killerClass in killers.items()]
+        results.append(('opt', replayOPT(pages, frameCount)))
+        for name, faults in results:
+            rows.append({
+                'policy': name,
+                'frames': frameCount,
+                'references': total,
+                'faults': faults,
+                'hitRatio': (total - faults) / total if total else 0.0,
+            })
+    return rows
+
+
+def printTable(rows):
+    print(tabulate([[row[name] for name in BENCHMARK_FIELDS] for row in rows], headers=BENCHMARK_FIELDS, tablefmt='psql', floatfmt='.3f'))
+
+def writeCSV(rows, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=BENCHMARK_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    references = recordRun(sweep.grid(scheduler=['rr'], quantum=[2], frameSize=[2], workload=['mixed'])[0])
+    printTable(benchmark(references, [2, 4, 8, 16, 32]))
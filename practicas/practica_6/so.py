@@ -3,7 +3,15 @@
 from hardware import *
 from designer import *
 from time import sleep
+from bisect import bisect_right
+from array import array
+from collections import deque, OrderedDict
+from heapq import heappush, heappop, heapify
+from itertools import count
+from mmap import mmap
+from tempfile import TemporaryFile
 import log
+from tracer import *
 
 #Estos son estados de pcb
 RUNNING = "RUNNING"
@@ -11,13 +19,19 @@ READY = "READY"
 NEW = "NEW"
 WAITING = "WAITING"
 TERMINATED = "TERMINATED"
+PCB_STATES = [NEW, READY, RUNNING, WAITING, TERMINATED]
 
 ## emulates a compiled program
+## las instrucciones se guardan comprimidas como runs [instruccion, cantidad]
+## (ej: ASM.CPU(1000) ocupa un solo run) junto con la direccion logica donde empieza cada run
 class Program():
 
     def __init__(self, name, instructions):
         self._name = name
-        self._instructions = self.expand(instructions)
+        self._runs = []
+        self._offsets = []
+        self._size = 0
+        self.encode(instructions)
         self._priority = 0
 
     @property
@@ -25,29 +39,75 @@ class Program():
         return self._name
 
     @property
-    def instructions(self):
-        return self._instructions
+    def runs(self):
+        return self._runs
 
-    def addInstr(self, instruction):
-        self._instructions.append(instruction)
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return self._size
+
+    def addInstr(self, instruction, times=1):
+        if self._runs and self._runs[-1][0] == instruction:
+            self._runs[-1][1] += times
+        else:
+            self._offsets.append(self._size)
+            self._runs.append([instruction, times])
+        self._size += times
 
-    def expand(self, instructions):
-        expanded = []
+    def encode(self, instructions):
         for i in instructions:
-            if isinstance(i, list):
+            if isinstance(i, InstructionRun):
+                ## is a run of the same instruction
+                self.addInstr(i.instruction, i.times)
+            elif isinstance(i, list):
                 ## is a list of instructions
-                expanded.extend(i)
+                for instr in i:
+                    self.addInstr(instr)
             else:
                 ## a single instr (a String)
-                expanded.append(i)
+                self.addInstr(i)
 
         ## now test if last instruction is EXIT
         ## if not... add an EXIT as final instruction
-        last = expanded[-1]
-        if not ASM.isEXIT(last):
-            expanded.append(INSTRUCTION_EXIT)
+        if not self._runs or not ASM.isEXIT(self._runs[-1][0]):
+            self.addInstr(INSTRUCTION_EXIT)
+
+    # indice del run que contiene la direccion logica (busqueda binaria)
+    def runIndex(self, logicalAddress):
+        return bisect_right(self._offsets, logicalAddress) - 1
+
+    # instruccion en la direccion logica
+    def instructionAt(self, logicalAddress):
+        return self._runs[self.runIndex(logicalAddress)][0]
+
+    # cantidad de instrucciones de CPU seguidas a partir de la direccion logica
+    def burstAt(self, logicalAddress):
+        i = self.runIndex(logicalAddress)
+        instruction, times = self._runs[i]
+        if ASM.opcode(instruction) != OPCODE_CPU:
+            return 0
+        return self._offsets[i] + times - logicalAddress
+
+    # instrucciones codificadas entre first (incluida) y last (excluida)
+    def slice(self, first, last):
+        last = min(last, self._size)
+        instructions = array('H')
+        i = self.runIndex(first)
+        while first < last:
+            instruction, times = self._runs[i]
+            runEnd = min(self._offsets[i] + times, last)
+            instructions.extend(array('H', [instruction]) * (runEnd - first))
+            first = runEnd
+            i += 1
+        return instructions
 
-        return expanded
+    # instrucciones de la pagina indicada
+    def page(self, page, size):
+        firstInst = page * size
+        return self.slice(firstInst, firstInst + size)
 
     @property
     def priority(self):
@@ -57,19 +117,35 @@ class Program():
         self._priority = priority
 
     def __repr__(self):
-        return "Program({name}, {instructions})".format(name=self._name, instructions=self._instructions)
+        runs = ["{instr} x {times}".format(instr=ASM.mnemonic(instr), times=times) for instr, times in self._runs]
+        return "Program({name}, {instructions})".format(name=self._name, instructions=runs)
 
 
 ## emulates an Input/Output device controller (driver)
+## pedido de IO en espera: el pcb y la instruccion de IO a ejecutar
+class IoRequest():
+
+    __slots__ = ('pcb', 'instruction')
+
+    def __init__(self, pcb, instruction):
+        self.pcb = pcb
+        self.instruction = instruction
+
+    def __repr__(self):
+        return "{{'pcb': {pcb}, 'instruction': {instruction}}}".format(pcb=self.pcb, instruction=self.instruction)
+
+
 class IoDeviceController():
 
-    def __init__(self, device):
+    def __init__(self, device, hardware):
         self._device = device
-        self._waiting_queue = []
+        self._hardware = hardware
+        self._waiting_queue = deque()
         self._currentPCB = None
+        self._currentInstruction = None
 
     def runOperation(self, pcb, instruction):
-        pair = {'pcb': pcb, 'instruction': instruction}
+        pair = IoRequest(pcb, instruction)
         # append: adds the element at the end of the queue
         self._waiting_queue.append(pair)
         # try to send the instruction to hardware's device (if is idle)
@@ -77,23 +153,26 @@ class IoDeviceController():
 
     def getFinishedPCB(self):
         finishedPCB = self._currentPCB
+        self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_DEVICE_DONE, finishedPCB.pid, ASM.operand(self._currentInstruction))
         self._currentPCB = None
         self.__load_from_waiting_queue_if_apply()
         return finishedPCB
 
     def __load_from_waiting_queue_if_apply(self):
         if (len(self._waiting_queue) > 0) and self._device.is_idle:
-            ## pop(): extracts (deletes and return) the first element in queue
-            pair = self._waiting_queue.pop(0)
+            ## popleft(): extracts (deletes and return) the first element in queue
+            pair = self._waiting_queue.popleft()
             # print(pair)
-            pcb = pair['pcb']
-            instruction = pair['instruction']
+            pcb = pair.pcb
+            instruction = pair.instruction
             self._currentPCB = pcb
+            self._currentInstruction = instruction
             self._device.execute(instruction)
+            self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_DEVICE_START, pcb.pid, ASM.operand(instruction))
 
     def __repr__(self):
         return "IoDeviceController for {deviceID} running: {currentPCB} waiting: {waiting_queue}".format(
-            deviceID=self._device.deviceId, currentPCB=self._currentPCB, waiting_queue=self._waiting_queue)
+            deviceID=self._device.deviceId, currentPCB=self._currentPCB, waiting_queue=list(self._waiting_queue))
 
 
 ## emulates the  Interruptions Handlers
@@ -109,39 +188,76 @@ class AbstractInterruptionHandler():
         log.logger.error("-- EXECUTE MUST BE OVERRIDEN in class {classname}".format(classname=self.__class__.__name__))
 
     # método para correr siguiente ciclo en #KILL #IO_IN
-    def runNextCicle(self):
-        if not self.kernel.scheduler.isEmptyQ():         # si hay un proceso en espera
-            nextPCB = self.kernel.scheduler.getNext()    # el primer pcb en la readyQueue
-            self.runProcess(nextPCB)
+    def runNextCicle(self, core=0):
+        nextPCB = self.nextAdmissible(core)
+        if nextPCB is not None:                          # si hay un proceso en espera
+            self.runProcess(nextPCB, core)
+
+    # saca pcbs de la readyQ del nucleo hasta encontrar uno que pueda correr
+    # (los suspendidos quedan esperando que los readmitan), o None si se vacia;
+    # si la readyQ del nucleo esta vacia le roba un pcb a la del nucleo mas cargado
+    def nextAdmissible(self, core=0):
+        while True:
+            scheduler = self.kernel.schedulers[core]
+            if scheduler.isEmptyQ():
+                scheduler = self.kernel.busiestScheduler()
+            if scheduler.isEmptyQ():
+                return None
+            nextPCB = scheduler.getNext()                # el primer pcb en la readyQueue
+            self.kernel.migrate(nextPCB, core)           # si se lo robo a otro nucleo, se trae su historia
+            if not self.kernel.memoryManager.park(nextPCB):
+                return nextPCB
+            nextPCB.setState(READY)
 
     # método para correr o dejar en readyQ proceso en #NEW #IO_OUT
-    def runNextProcess(self, pcbToAdd):
-        if self.kernel.pcbTable.isRunningPCB():
-            runningPCB = self.kernel.pcbTable.runningPCB
-            if self.kernel.scheduler.mustExpropiate(runningPCB, pcbToAdd):  # si hay que expropiar
-                self.contextSwitch(pcbToAdd)                                # hace el context switch
-            else:                                                           # sino
-                pcbToAdd.setState(READY)                                    # cambia estado a READY
-                self.kernel.scheduler.add(pcbToAdd)                         # agrega el pcb a la readyQ
+    # sin nucleo indicado, el kernel elige uno (balanceo de carga)
+    def runNextProcess(self, pcbToAdd, core=None):
+        if core is None:
+            core = self.kernel.chooseCore(pcbToAdd)
+        self.kernel.migrate(pcbToAdd, core)
+        scheduler = self.kernel.schedulers[core]
+        if self.kernel.pcbTable.isRunningPCB(core):
+            runningPCB = self.kernel.pcbTable.runningPCBIn(core)
+            if scheduler.mustExpropiate(runningPCB, pcbToAdd):     # si hay que expropiar
+                self.contextSwitch(pcbToAdd, core)                 # hace el context switch
+            else:                                                  # sino
+                pcbToAdd.setState(READY)                           # cambia estado a READY
+                scheduler.add(pcbToAdd)                            # agrega el pcb a la readyQ
         else:
-            self.runProcess(pcbToAdd)
+            self.runProcess(pcbToAdd, core)
 
     # lleva a cabo el context switch entre pcb
-    # hay un pcb en estado running en la pcbTable
-    def contextSwitch(self, pcbToAdd):
-        exPCB = self.kernel.pcbTable.runningPCB
+    # hay un pcb en estado running en el nucleo
+    def contextSwitch(self, pcbToAdd, core=0):
+        scheduler = self.kernel.schedulers[core]
+        exPCB = self.kernel.pcbTable.runningPCBIn(core)
         exPCB.setState(READY)
-        self.kernel.dispatcher.save(exPCB)        # guarda el estado pcb (actualiza el pc)
-        self.kernel.scheduler.add(exPCB)          # lo agrega a la readyQ
-        self.runProcess(pcbToAdd)                 # corre el siguiente pcb
-
-
-    # pone a correr un pcb
-    def runProcess(self, pcb):
-        HARDWARE.timer.reset()
-        pcb.setState(RUNNING)                    # cambia estado de pcb a running
-        self.kernel.dispatcher.load(pcb)         # carga el pcb en memoria
-        self.kernel.pcbTable.setRunningPCB(pcb)  # establece el pcb como runningPCB
+        self.kernel.dispatcher.save(exPCB, core)  # guarda el estado pcb (actualiza el pc)
+        scheduler.descheduled(exPCB)              # avisa al scheduler que dejo la CPU
+        scheduler.add(exPCB)                      # lo agrega a la readyQ
+        self.runProcess(pcbToAdd, core)           # corre el siguiente pcb
+
+
+    # pone a correr un pcb en el nucleo
+    # un pcb suspendido (sin memoria) no corre: queda esperando que lo readmitan y corre el siguiente
+    def runProcess(self, pcb, core=0):
+        if self.kernel.memoryManager.park(pcb):
+            pcb.setState(READY)
+            self.kernel.pcbTable.setRunningPCB(None, core)
+            pcb = self.nextAdmissible(core)
+            if pcb is None:
+                return
+        self.kernel.hardware.cores[core].timer.reset()
+        pcb.setState(RUNNING)                          # cambia estado de pcb a running
+        self.kernel.migrate(pcb, core)                 # recuerda en que nucleo corre
+        self.kernel.dispatcher.load(pcb, core)         # carga el pcb en memoria
+        self.kernel.pcbTable.setRunningPCB(pcb, core)  # establece el pcb como runningPCB del nucleo
+        self.kernel.schedulers[core].dispatched(pcb)   # avisa al scheduler (ej: para configurar el quantum)
+
+    # los procesos suspendidos que entran otra vez en memoria vuelven a planificarse
+    def resumeSuspended(self):
+        for pcb in self.kernel.memoryManager.readmit():
+            self.runNextProcess(pcb)
 
 
 class NewInterruptionHandler(AbstractInterruptionHandler):
@@ -152,6 +268,7 @@ class NewInterruptionHandler(AbstractInterruptionHandler):
         priority = irq.parameters[1]
         pid = self.kernel.pcbTable.getNewPID()
         pcb = PCB(pid, path, priority)
+        pcb.setLimit(len(self.kernel.fileSystem.read(path)) - 1)
         #self.kernel.loader.load(pcb) no debería cargar nada
         self.kernel.pcbTable.add(pcb)
 
@@ -163,70 +280,104 @@ class KillInterruptionHandler(AbstractInterruptionHandler):
 
     def execute(self, irq):
         # fin de proceso
-        log.logger.info(" Program Finished ")
-        pcb = self.kernel.pcbTable.runningPCB
-        self.kernel.dispatcher.save(pcb)
+        log.info(" Program Finished ")
+        core = irq.core
+        scheduler = self.kernel.schedulers[core]
+        pcb = self.kernel.pcbTable.runningPCBIn(core)
+        self.kernel.dispatcher.save(pcb, core)
         pcb.setState(TERMINATED)
-        pt = pcb.pageTable
-        self.kernel.memoryManager.freeFrames(pt.values())
-        self.kernel.pcbTable.setRunningPCB(None)
+        scheduler.descheduled(pcb)
+        scheduler.terminated(pcb)
+        self.kernel.memoryManager.freeProcess(pcb)
+        self.kernel.pcbTable.setRunningPCB(None, core)
 
         # siguiente ciclo de ejecución (si hay procesos en readyQueue)
-        self.runNextCicle()
+        self.runNextCicle(core)
+        # con la memoria liberada pueden volver procesos suspendidos
+        self.resumeSuspended()
 
 
 class IoInInterruptionHandler(AbstractInterruptionHandler):
 
     def execute(self, irq):
         operation = irq.parameters
-        pcb = self.kernel.pcbTable.runningPCB
-        self.kernel.dispatcher.save(pcb)
-        self.kernel.pcbTable.setRunningPCB(None)
+        core = irq.core
+        pcb = self.kernel.pcbTable.runningPCBIn(core)
+        self.kernel.dispatcher.save(pcb, core)
+        self.kernel.pcbTable.setRunningPCB(None, core)
         pcb.setState(WAITING)
+        self.kernel.schedulers[core].descheduled(pcb)
 
         # ejecución en el IoDevice
         self.kernel.ioDeviceController.runOperation(pcb, operation)
-        log.logger.info(self.kernel.ioDeviceController)
+        log.info("{}", self.kernel.ioDeviceController)
 
         # siguiente proceso esperando tiempo de CPU
-        self.runNextCicle()
+        self.runNextCicle(core)
+        self.resumeSuspended()
 
 
 class IoOutInterruptionHandler(AbstractInterruptionHandler):
 
     def execute(self, irq):
         pcb = self.kernel.ioDeviceController.getFinishedPCB()
-        log.logger.info(self.kernel.ioDeviceController)
+        log.info("{}", self.kernel.ioDeviceController)
+        core = self.kernel.chooseCore(pcb)
+        self.kernel.migrate(pcb, core)
+        self.kernel.schedulers[core].ioReturned(pcb)
 
         #siguiente
-        self.runNextProcess(pcb)
+        self.runNextProcess(pcb, core)
 
 
 class TimeoutInterruptionHandler(AbstractInterruptionHandler):
 
     def execute(self, irq):
-        HARDWARE.timer.reset()
-        if not self.kernel.scheduler.isEmptyQ():
-            nextPCB = self.kernel.scheduler.getNext()
-            self.contextSwitch(nextPCB)
+        core = irq.core
+        scheduler = self.kernel.schedulers[core]
+        self.kernel.hardware.cores[core].timer.reset()
+        runningPCB = self.kernel.pcbTable.runningPCBIn(core)
+        scheduler.expired(runningPCB)
+        if scheduler.mustExpropiateOnTimeout(runningPCB):
+            nextPCB = scheduler.getNext()
+            self.contextSwitch(nextPCB, core)
+        else:
+            # sigue corriendo el mismo pcb (con el quantum que le corresponda ahora)
+            scheduler.dispatched(runningPCB)
 
 
 class StatInterruptionHandler(AbstractInterruptionHandler):
 
     def execute(self, irq):
-        DESIGNER.printGantt(self.kernel.pcbTable, self.kernel.scheduler.readyQ, HARDWARE.clock.currentTick)
+        # el parametro indica cuantos ticks iguales representa (los salteados por el clock)
+        times = irq.parameters or 1
+        tick = self.kernel.hardware.clock.currentTick
+        self.kernel.designer.recordGantt(self.kernel.pcbTable, self.kernel.readyQ, tick - times + 1, times)
 
 
 class PageFaultInterruptionHandler(AbstractInterruptionHandler):
     
     def execute(self, irq):
-        pcb = self.kernel.pcbTable.runningPCB
+        pcb = self.kernel.pcbTable.runningPCBIn(irq.core)
         frame = self._kernel.loader.loadNextFrame(irq.parameters, pcb)
-        HARDWARE.mmu.setPageFrame(irq.parameters, frame)
+        self.kernel.hardware.tracer.record(self.kernel.hardware.clock.currentTick, EVENT_PAGE_FAULT, pcb.pid, irq.parameters, frame)
+
+        # lectura anticipada de las paginas siguientes (mientras haya frames libres)
+        readAhead = self.kernel.memoryManager.readAhead
+        if readAhead is not None:
+            for page in readAhead.pagesAfter(pcb, irq.parameters):
+                frame = self._kernel.loader.prefetch(page, pcb)
+                if frame is None:
+                    break
+                readAhead.prefetched(pcb, page, frame)
+                self.kernel.hardware.tracer.record(self.kernel.hardware.clock.currentTick, EVENT_PREFETCH, pcb.pid, page, frame)
 
 
 class PCB():
 
+    ## sin __dict__ por instancia (con muchos procesos la memoria la ocupan los pcbs)
+    __slots__ = ('_pid', '_pageTable', '_pc', '_state', '_path', '_priority', '_limit', '_core', '_table')
+
     def __init__(self, pid, path, priority):  # se inicializan siempre igual -> state, pc
         self._pid = pid
         self._pageTable = dict()
@@ -234,6 +385,9 @@ class PCB():
         self._state = NEW
         self._path = path
         self._priority = priority
+        self._limit = 0
+        self._core = None
+        self._table = None      # tabla de pcbs donde esta (se le avisa cada cambio de estado)
 
     @property
     def pid(self):
@@ -259,10 +413,32 @@ class PCB():
     def priority(self):
         return self._priority
 
+    # ultima direccion logica valida del programa
+    @property
+    def limit(self):
+        return self._limit
+
+    def setLimit(self, limit):
+        self._limit = limit
+
+    # nucleo donde corrio por ultima vez (None si nunca corrio)
+    @property
+    def core(self):
+        return self._core
+
+    def setCore(self, core):
+        self._core = core
+
     # setter para cambiar de estado
     ##@state.setter
     def setState(self, newState):
+        oldState = self._state
         self._state = newState
+        if self._table is not None:
+            self._table.stateChanged(self, oldState, newState)
+
+    def setTable(self, table):
+        self._table = table
 
     def setPc(self, pc):
         self._pc = pc
@@ -272,14 +448,16 @@ class PCB():
 
     def addPageToTable(self, page, frame):
         self._pageTable[page] = frame
-        for page in self._pageTable:
-            log.logger.info("Page {pag} in frame: {fr}".format(pag=page, fr=self._pageTable[page]))
+        if log.isEnabled(log.DEBUG):
+            for page in self._pageTable:
+                log.debug("Page {pag} in frame: {fr}", pag=page, fr=self._pageTable[page])
 
     def removePageFromTable(self, page):
         del self._pageTable[page]
-        log.logger.info("Se debería haber eliminado la page {pag}".format(pag=page))
-        for pg in self._pageTable:
-            log.logger.info("La pagina es {pag} y esta en el frame {fr}".format(pag=pg, fr=self._pageTable[pg]))
+        log.info("Se debería haber eliminado la page {pag}", pag=page)
+        if log.isEnabled(log.DEBUG):
+            for pg in self._pageTable:
+                log.debug("La pagina es {pag} y esta en el frame {fr}", pag=pg, fr=self._pageTable[pg])
     
     def __repr__(self):
         return "PCB {}".format(self._pid)
@@ -287,108 +465,197 @@ class PCB():
 
 class PCBTable():
 
-    def __init__(self):
-        self._pcbTable = []
-        self._runningPCB = None
+    ## los pcbs se indexan por pid y ademas se agrupan por estado (un set de pids por estado),
+    ## asi las busquedas y las cantidades por estado no recorren la tabla
+    ## un runningPCB por nucleo
+    def __init__(self, cores=1):
+        self._pcbTable = dict()
+        self._byState = {state: set() for state in PCB_STATES}
+        self._runningPCBs = [None] * cores
         self._pidNr = -1
+        self._archive = None
+        self._archived = 0
 
     # indica si el pcbTable es vacío
     def isEmpty(self):
         return not self._pcbTable
 
-    # devuelve el pcb con pid
+    # devuelve el pcb con pid (None si no esta en la tabla)
     def get(self, pid):
-        i = 0
-        while self._pcbTable[i].pid != pid and not self.isEmpty():
-            i += 1
-        return self._pcbTable[i].pid
+        return self._pcbTable.get(pid)
 
     # agrega un pcb a la tabla
     def add(self, pcb):
-        self._pcbTable.append(pcb)
+        self._pcbTable[pcb.pid] = pcb
+        self._byState[pcb.state].add(pcb.pid)
+        pcb.setTable(self)
 
-    # elimina el pcb con pid de la tabla
+    # elimina el pcb con pid de la tabla (si no esta no hace nada)
     def remove(self, pid):
-        i = 0
-        while self._pcbTable[i].pid != pid and not self.isEmpty():
-            i += 1
-        self._pcbTable.pop(i)
+        pcb = self._pcbTable.pop(pid, None)
+        if pcb is not None:
+            self._byState[pcb.state].discard(pid)
+            pcb.setTable(None)
+
+    ## archive: donde van los pcbs que terminan (ej: [] o deque(maxlen=100), None = quedan en la tabla)
+    ## en corridas largas la tabla queda solo con los pcbs vivos
+    def setArchive(self, archive):
+        self._archive = archive
 
+    @property
+    def archive(self):
+        return self._archive
+
+    # el pcb avisa que cambio de estado
+    def stateChanged(self, pcb, oldState, newState):
+        self._byState[oldState].discard(pcb.pid)
+        self._byState[newState].add(pcb.pid)
+        if newState == TERMINATED and self._archive is not None:
+            self.remove(pcb.pid)
+            self._archive.append(pcb)
+            self._archived += 1
+
+    # pids de los pcbs en ese estado
+    def pidsIn(self, state):
+        return self._byState[state]
+
+    # cantidad de pcbs en ese estado (los terminados incluyen los archivados)
+    def count(self, state):
+        if state == TERMINATED:
+            return len(self._byState[state]) + self._archived
+        return len(self._byState[state])
+
+    # pcb corriendo en el nucleo 0
     @property
     def runningPCB(self):
-        return self._runningPCB
+        return self._runningPCBs[0]
+
+    # pcbs corriendo en cada nucleo (None si el nucleo esta libre)
+    @property
+    def runningPCBs(self):
+        return self._runningPCBs
+
+    def runningPCBIn(self, core):
+        return self._runningPCBs[core]
 
     ##@setRunningPCB.setter
-    def setRunningPCB(self, pcb):
-        self._runningPCB = pcb
+    def setRunningPCB(self, pcb, core=0):
+        self._runningPCBs[core] = pcb
+
+    def isRunningPCB(self, core=0):
+        return self._runningPCBs[core] is not None
 
-    def isRunningPCB(self):
-        return self._runningPCB is not None
+    # indica si hay pcbs (en la tabla o archivados) y todos terminaron
+    def allTerminated(self):
+        if self.isEmpty() and not self._archived:
+            return False
+        return len(self._byState[TERMINATED]) == len(self._pcbTable)
 
     def getNewPID(self):
         self._pidNr += 1
         return self._pidNr
     # devuelve el número único de pid a asignar
 
+    # pcbs de la tabla, en orden de pid
     def allPCBs(self):
-        return self._pcbTable
+        return self._pcbTable.values()
     
     def getPCB(self, pid):
-        i = 0
-        while self._pcbTable[i].pid != pid and not self.isEmpty():
-            i += 1
-        return self._pcbTable[i]
+        return self.get(pid)
 
 
 class Loader():
 
-    def __init__(self, mm, fileSystem):
+    def __init__(self, mm, fileSystem, hardware):
         self._mm = mm
         self._fileSystem = fileSystem
-        self._killAlgorithm = mm.killAlgorithm()
+        self._hardware = hardware
 
     def loadNextFrame(self, pageToLoad, pcb):
-        frameSize = self._mm.frameSize
-        
+        prg, fromSwap = self.readPage(pageToLoad, pcb)
+        frame = self._mm.allocFrame(pcb)
+        self.placePage(pageToLoad, pcb, frame, prg, fromSwap)
+        return frame
+
+    # carga la pagina solo si hay un frame libre para el proceso (sin desalojar a nadie)
+    # retorna el frame, o None si no se cargo
+    def prefetch(self, pageToLoad, pcb):
+        frame = self._mm.allocFreeFrame(pcb)
+        if frame is not None:
+            prg, fromSwap = self.readPage(pageToLoad, pcb)
+            self.placePage(pageToLoad, pcb, frame, prg, fromSwap)
+        return frame
+
+    # contenido de la pagina y si viene del swap
+    def readPage(self, pageToLoad, pcb):
         #Quiero ver si esta en swap si no tengo que leer el archivo
+        #(lo que viene del swap ya no tiene copia afuera: el frame queda sucio)
         if self._mm.isInSwap(pcb.pid, pageToLoad):
-            prg = self._mm.getFromSwap(pcb.pid, pageToLoad)
-        else:
-            prg = self._fileSystem.readFromTo(pcb.path, pageToLoad, frameSize)
-        
-        frame = self._mm.allocFrame()
-        
-        i=0
-        for inst in prg:
-            HARDWARE.memory.write((frame*frameSize) + i, inst)
-            log.logger.info("page: {p} - offset: {cel} - instr: {instr}".format(p=pageToLoad, cel=i, instr=inst))
-            i+=1
+            return self._mm.getFromSwap(pcb.pid, pageToLoad), True
+        return self._fileSystem.readFromTo(pcb.path, pageToLoad, self._mm.frameSize), False
+
+    def placePage(self, pageToLoad, pcb, frame, prg, fromSwap):
+        self._hardware.memory.write_block(frame * self._mm.frameSize, prg)
+        self._hardware.frameFlags.loaded(frame, fromSwap)
+        log.info("page: {p} - frame: {fr} - instr: {instr}", p=pageToLoad, fr=frame, instr=log.Lazy(ASM.disassemble, prg))
 
         pcb.addPageToTable(pageToLoad, frame)
-        self._killAlgorithm.newFrame(pcb, pageToLoad, frame)
-        return frame
+        self._mm.newFrame(pcb, pageToLoad, frame)
 
 
 class Dispatcher():
 
-    def load(self, pcb):
-        log.logger.info("Cargando PCB: {} ".format(pcb))
-        HARDWARE.cpu.pc = pcb.pc
-        HARDWARE.mmu.resetTLB()
-        pt = pcb.pageTable
-        for key in pt:
-            HARDWARE.mmu.setPageFrame(key,pt[key])
+    def __init__(self, hardware):
+        self._hardware = hardware
+
+    def load(self, pcb, core=0):
+        log.info("Cargando PCB: {} ", pcb)
+        self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_LOAD, pcb.pid, pcb.pc)
+        cpu = self._hardware.cores[core].cpu
+        mmu = self._hardware.cores[core].mmu
+        cpu.pc = pcb.pc
+        mmu.limit = pcb.limit
+        mmu.asid = pcb.pid
+        mmu.setPageTable(pcb.pageTable)
+        mmu.resetTLB()
 
-    def save(self, pcb):
-        log.logger.info("Actualizando PCB: {} ".format(pcb))
-        pcb.setPc(HARDWARE.cpu.pc)
-        HARDWARE.cpu.pc = -1
+    def save(self, pcb, core=0):
+        log.info("Actualizando PCB: {} ", pcb)
+        cpu = self._hardware.cores[core].cpu
+        pcb.setPc(cpu.pc)
+        cpu.pc = -1
+        self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_SAVE, pcb.pid, pcb.pc)
 
 
 class Scheduler():
 
     def __init__(self):
-        self._readyQ = []
+        self._readyQ = deque()
+        self._fileSystem = None
+        self._hardware = None
+        self._core = None
+
+    # el kernel le pasa su file system (para los schedulers que miran los programas)
+    def setFileSystem(self, fileSystem):
+        self._fileSystem = fileSystem
+
+    # el kernel le pasa su hardware y el nucleo que planifica
+    def setHardware(self, hardware, core):
+        self._hardware = hardware
+        self._core = core
+
+    # timer del nucleo que planifica
+    @property
+    def timer(self):
+        return self._core.timer
+
+    @property
+    def clock(self):
+        return self._hardware.clock
+
+    # cantidad de pcbs en la readyQ
+    def size(self):
+        return len(self._readyQ)
 
     # indica si la cola está vacía
     def isEmptyQ(self):
@@ -401,7 +668,7 @@ class Scheduler():
     # remueve el primer elemento de la cola
     def getNext(self):
         if not self.isEmptyQ():
-            return self._readyQ.pop(0)
+            return self._readyQ.popleft()
 
     @property
     def readyQ(self):
@@ -411,6 +678,39 @@ class Scheduler():
     def mustExpropiate(self, pcbInCPU, pcbToAdd):
         return False
 
+    # al vencer el quantum se expropia si hay otro pcb esperando
+    def mustExpropiateOnTimeout(self, pcbInCPU):
+        return not self.isEmptyQ()
+
+    # avisos del kernel al scheduler, por default no hacen nada
+    # el pcb empieza (o sigue) a correr en CPU
+    def dispatched(self, pcb):
+        pass
+
+    # el pcb dejo la CPU (su estado ya es READY, WAITING o TERMINATED)
+    def descheduled(self, pcb):
+        pass
+
+    # el pcb en CPU agoto su quantum
+    def expired(self, pcb):
+        pass
+
+    # el pcb termino su operacion de IO
+    def ioReturned(self, pcb):
+        pass
+
+    # el pcb termino
+    def terminated(self, pcb):
+        pass
+
+    # estado que el scheduler lleva de un pcb entre rafagas (ej: nivel, vruntime, rafagas estimadas):
+    # cuando el pcb migra a otro nucleo se saca de este scheduler y se le pasa al del otro
+    def takeHistory(self, pcb):
+        return None
+
+    def giveHistory(self, pcb, history):
+        pass
+
 
 class FCFSScheduler(Scheduler):
 
@@ -423,57 +723,370 @@ class PriorityScheduler(Scheduler):
     ##Por default no tiene aging
     ##Al instanciar se debe enviar true y la cantidad de ticks que modifican en 1 la prioridad
     ##para que tenga aging
+    ##La readyQ es un heap de [clave, orden de llegada, pcb]: a igual clave sale primero
+    ##el que llego antes
+    ##Aging por epocas: cada ticksAge ticks (una epoca) todos los pcbs en espera mejoran 1 su prioridad.
+    ##La prioridad efectiva es prioridad - (epoca actual - epoca de llegada), asi que la clave
+    ##prioridad + epoca de llegada no cambia con el tiempo y el orden del heap nunca queda viejo.
     def __init__(self, aging=False, ticksAge=5):
         Scheduler.__init__(self)
+        self._readyQ = []
         self._hasAging = aging
         self._ticksAge = ticksAge
-        self._priorityDict = dict()
+        self._arrivals = count()
+        self._orderedQ = None
 
     def add(self, pcb):
-        i = 0
-        size = len(self._readyQ)
-        while i != size and self.priorityElement(i) <= pcb.priority:
-            i += 1
-        self._readyQ.insert(i, pcb) ##Pone el pcb en la fila
-        self._priorityDict[pcb.pid] = HARDWARE.clock.currentTick
+        heappush(self._readyQ, [self.key(pcb), next(self._arrivals), pcb]) ##Pone el pcb en la fila
+        self._orderedQ = None
 
-    def priorityElement(self, i):
+    def getNext(self):
+        if not self.isEmptyQ():
+            self._orderedQ = None
+            return heappop(self._readyQ)[2]
+
+    def key(self, pcb):
         if self._hasAging:
-            ##Suma la prioridad del pcb menos el plus por tiempo en la queue
-            return self._readyQ[i].priority - self.plusAge(self._readyQ[i].pid)
-        else:
-            ##Ignora el tiempo en la queue
-            return self._readyQ[i].priority
+            return pcb.priority + self.epoch(self.clock.currentTick)
+        return pcb.priority
 
-    def plusAge(self, id):
-        ##Tick actual menos el tick desde el cual espera dividido enteramente por el tickAge
-        timeIn = self._priorityDict[id]
-        return (HARDWARE.clock.currentTick - timeIn)//self._ticksAge
+    def epoch(self, tick):
+        return tick // self._ticksAge
+
+    ##Vista ordenada de la readyQ (para el diagrama de gantt)
+    @property
+    def readyQ(self):
+        if self._orderedQ is None:
+            self._orderedQ = [entry[2] for entry in sorted(self._readyQ)]
+        return self._orderedQ
 
 
 class PreemptivePriorityScheduler(PriorityScheduler):
 
+    ##Las dos claves se calculan en la epoca actual (la del pcb que llega es la misma que usa add),
+    ##asi que el aging no cambia la comparacion: el pcb que sale de la CPU no acumula espera
     def mustExpropiate(self, pcbInCPU, pcbToAdd):
-        return pcbInCPU.priority > pcbToAdd.priority
+        return self.key(pcbInCPU) > self.key(pcbToAdd)
 
 
 class RoundRobin(Scheduler):
 
     def __init__(self, quantum):
         Scheduler.__init__(self)
-        HARDWARE.timer.quantum = quantum
+        self._quantum = quantum
+
+    def setHardware(self, hardware, core):
+        Scheduler.setHardware(self, hardware, core)
+        self.timer.quantum = self._quantum
 
     def add(self, pcb):
         self.enqueue(pcb)
 
 
+class MultilevelFeedbackQueue(Scheduler):
+
+    ##Una cola FIFO por nivel, el nivel 0 es el de mayor prioridad y cada nivel tiene su quantum
+    ##(None = sin quantum, el pcb corre hasta terminar o hacer IO).
+    ##Un pcb nuevo entra al nivel 0, baja un nivel cada vez que agota su quantum y sube uno
+    ##cuando vuelve de IO. Cada boostTicks ticks todos los pcbs vuelven al nivel 0.
+    def __init__(self, quantums=(2, 4, 8), boostTicks=50):
+        Scheduler.__init__(self)
+        self._quantums = list(quantums)
+        self._queues = [deque() for _ in self._quantums]
+        self._levelDict = dict()
+        self._boostTicks = boostTicks
+        self._nextBoost = boostTicks
+
+    def isEmptyQ(self):
+        return not any(self._queues)
+
+    def size(self):
+        return sum(len(queue) for queue in self._queues)
+
+    def level(self, pcb):
+        return self._levelDict.setdefault(pcb.pid, 0)
+
+    def add(self, pcb):
+        self.boostIfDue()
+        self._queues[self.level(pcb)].append(pcb)
+
+    def getNext(self):
+        self.boostIfDue()
+        for queue in self._queues:
+            if queue:
+                return queue.popleft()
+
+    ##Un pcb de un nivel mas alto expropia al que esta en CPU
+    def mustExpropiate(self, pcbInCPU, pcbToAdd):
+        return self.level(pcbToAdd) < self.level(pcbInCPU)
+
+    ##Al agotar el quantum solo se cede la CPU a pcbs de su mismo nivel o de uno mas alto
+    def mustExpropiateOnTimeout(self, pcbInCPU):
+        self.boostIfDue()
+        level = self.level(pcbInCPU)
+        return any(self._queues[:level + 1])
+
+    def dispatched(self, pcb):
+        self.timer.quantum = self._quantums[self.level(pcb)]
+
+    def expired(self, pcb):
+        self._levelDict[pcb.pid] = min(self.level(pcb) + 1, len(self._quantums) - 1)
+
+    def ioReturned(self, pcb):
+        self._levelDict[pcb.pid] = max(self.level(pcb) - 1, 0)
+
+    def terminated(self, pcb):
+        self._levelDict.pop(pcb.pid, None)
+
+    def takeHistory(self, pcb):
+        return self._levelDict.pop(pcb.pid, None)
+
+    def giveHistory(self, pcb, history):
+        if history is not None:
+            self._levelDict[pcb.pid] = history
+
+    ##Vuelve todos los pcbs al nivel 0 (manteniendo el orden por nivel)
+    def boostIfDue(self):
+        tick = self.clock.currentTick
+        if self._boostTicks is None or tick < self._nextBoost:
+            return
+        while self._nextBoost <= tick:
+            self._nextBoost += self._boostTicks
+        top = self._queues[0]
+        for queue in self._queues[1:]:
+            top.extend(queue)
+            queue.clear()
+        self._levelDict = dict.fromkeys(self._levelDict, 0)
+
+    ##Vista de la readyQ en orden de nivel (para el diagrama de gantt)
+    @property
+    def readyQ(self):
+        return [pcb for queue in self._queues for pcb in queue]
+
+
+class CompletelyFairScheduler(Scheduler):
+
+    ##Estilo CFS: la readyQ se ordena por vruntime, el tiempo de CPU consumido por cada pcb
+    ##pesado por su prioridad (a menor valor de prioridad mas peso y mas lento crece el vruntime).
+    ##La readyQ es un heap de [vruntime, orden de llegada, pcb]: el vruntime de un pcb solo cambia
+    ##mientras corre, asi que la clave no se vuelve vieja mientras espera.
+    ##El quantum se recalcula en cada dispatch: targetLatency repartido entre los pcbs listos
+    ##segun su peso, nunca menos de minGranularity ticks.
+    def __init__(self, targetLatency=20, minGranularity=2):
+        Scheduler.__init__(self)
+        self._readyQ = []
+        self._arrivals = count()
+        self._targetLatency = targetLatency
+        self._minGranularity = minGranularity
+        self._vruntimeDict = dict()
+        self._minVruntime = 0
+        self._readyWeight = 0
+        self._runningPCB = None
+        self._runningSince = 0
+        self._orderedQ = None
+
+    def weight(self, pcb):
+        return 1.25 ** -pcb.priority
+
+    ##Un pcb nuevo arranca con el menor vruntime actual (no acapara la CPU ni queda al fondo)
+    def vruntime(self, pcb):
+        return self._vruntimeDict.setdefault(pcb.pid, self._minVruntime)
+
+    def isEmptyQ(self):
+        return not self._readyQ
+
+    def add(self, pcb):
+        heappush(self._readyQ, [self.vruntime(pcb), next(self._arrivals), pcb])
+        self._readyWeight += self.weight(pcb)
+        self._orderedQ = None
+
+    def getNext(self):
+        if not self.isEmptyQ():
+            self._orderedQ = None
+            pcb = heappop(self._readyQ)[2]
+            self._readyWeight -= self.weight(pcb)
+            return pcb
+
+    ##Suma al vruntime del pcb en CPU los ticks que corrio desde la ultima vez
+    def charge(self, pcb):
+        if pcb is not self._runningPCB:
+            return
+        tick = self.clock.currentTick
+        self._vruntimeDict[pcb.pid] = self.vruntime(pcb) + (tick - self._runningSince) / self.weight(pcb)
+        self._runningSince = tick
+        self.updateMinVruntime()
+
+    def updateMinVruntime(self):
+        candidates = []
+        if self._runningPCB is not None:
+            candidates.append(self.vruntime(self._runningPCB))
+        if self._readyQ:
+            candidates.append(self._readyQ[0][0])
+        if candidates:
+            self._minVruntime = max(self._minVruntime, min(candidates))
+
+    def timeslice(self, pcb):
+        weight = self.weight(pcb)
+        share = self._targetLatency * weight / (self._readyWeight + weight)
+        return max(self._minGranularity, round(share))
+
+    def dispatched(self, pcb):
+        self.charge(pcb)
+        self._runningPCB = pcb
+        self._runningSince = self.clock.currentTick
+        self.vruntime(pcb)
+        self.timer.quantum = self.timeslice(pcb)
+
+    def descheduled(self, pcb):
+        self.charge(pcb)
+        self._runningPCB = None
+
+    def expired(self, pcb):
+        self.charge(pcb)
+
+    ##Al volver de IO no conserva el credito acumulado mientras estuvo bloqueado
+    def ioReturned(self, pcb):
+        self._vruntimeDict[pcb.pid] = max(self.vruntime(pcb), self._minVruntime)
+
+    def terminated(self, pcb):
+        self._vruntimeDict.pop(pcb.pid, None)
+
+    ##El vruntime migra relativo al minimo de cada readyQ (mantiene su atraso o adelanto)
+    def takeHistory(self, pcb):
+        if pcb.pid not in self._vruntimeDict:
+            return None
+        return self._vruntimeDict.pop(pcb.pid) - self._minVruntime
+
+    def giveHistory(self, pcb, history):
+        if history is not None:
+            self._vruntimeDict[pcb.pid] = self._minVruntime + history
+
+    ##Expropia si el que llega quedo atrasado al menos minGranularity ticks respecto del que corre
+    def mustExpropiate(self, pcbInCPU, pcbToAdd):
+        self.charge(pcbInCPU)
+        return self.vruntime(pcbToAdd) + self._minGranularity < self.vruntime(pcbInCPU)
+
+    ##Al vencer el quantum sigue corriendo si todavia es el de menor vruntime
+    def mustExpropiateOnTimeout(self, pcbInCPU):
+        return not self.isEmptyQ() and self._readyQ[0][0] < self.vruntime(pcbInCPU)
+
+    ##Vista ordenada de la readyQ (para el diagrama de gantt)
+    @property
+    def readyQ(self):
+        if self._orderedQ is None:
+            self._orderedQ = [entry[2] for entry in sorted(self._readyQ)]
+        return self._orderedQ
+
+
+class ShortestJobFirst(Scheduler):
+
+    ##Ordena la readyQ por la rafaga de CPU estimada de cada pcb.
+    ##La estimacion es un promedio exponencial de las rafagas observadas:
+    ##estimada = alpha * ultima rafaga + (1 - alpha) * estimada anterior (firstGuess al principio).
+    ##Una rafaga va desde que el pcb entra a la CPU hasta que hace IO o termina
+    ##(si lo expropian la rafaga sigue abierta y se continua al volver a correr).
+    ##Con oracle=True no estima: lee del programa cuantas instrucciones de CPU le quedan.
+    ##La readyQ es un heap de [rafaga, orden de llegada, pcb].
+    def __init__(self, alpha=0.5, firstGuess=5, oracle=False):
+        Scheduler.__init__(self)
+        self._readyQ = []
+        self._arrivals = count()
+        self._alpha = alpha
+        self._firstGuess = firstGuess
+        self._oracle = oracle
+        self._guessDict = dict()
+        self._burstDict = dict()
+        self._runningSince = dict()
+        self._orderedQ = None
+
+    def add(self, pcb):
+        heappush(self._readyQ, [self.key(pcb), next(self._arrivals), pcb])
+        self._orderedQ = None
+
+    def getNext(self):
+        if not self.isEmptyQ():
+            self._orderedQ = None
+            return heappop(self._readyQ)[2]
+
+    def key(self, pcb):
+        return self.predictedBurst(pcb)
+
+    def predictedBurst(self, pcb):
+        if self._oracle:
+            return self._fileSystem.read(pcb.path).burstAt(pcb.pc)
+        return self._guessDict.get(pcb.pid, self._firstGuess)
+
+    ##Ticks que lleva corriendo la rafaga actual
+    def elapsedBurst(self, pcb):
+        elapsed = self._burstDict.get(pcb.pid, 0)
+        if pcb.pid in self._runningSince:
+            elapsed += self.clock.currentTick - self._runningSince[pcb.pid]
+        return elapsed
+
+    def dispatched(self, pcb):
+        self._runningSince.setdefault(pcb.pid, self.clock.currentTick)
+
+    def descheduled(self, pcb):
+        elapsed = self.elapsedBurst(pcb)
+        del self._runningSince[pcb.pid]
+        if pcb.state == READY:
+            ## expropiado: la rafaga sigue abierta
+            self._burstDict[pcb.pid] = elapsed
+        else:
+            ## hizo IO o termino: se cierra la rafaga y se actualiza la estimacion
+            self._burstDict.pop(pcb.pid, None)
+            if not self._oracle:
+                guess = self.predictedBurst(pcb)
+                self._guessDict[pcb.pid] = self._alpha * elapsed + (1 - self._alpha) * guess
+
+    def terminated(self, pcb):
+        self._guessDict.pop(pcb.pid, None)
+
+    ##Estimacion y rafaga abierta (un pcb que migra no esta corriendo)
+    def takeHistory(self, pcb):
+        return (self._guessDict.pop(pcb.pid, None), self._burstDict.pop(pcb.pid, None))
+
+    def giveHistory(self, pcb, history):
+        guess, burst = history if history is not None else (None, None)
+        if guess is not None:
+            self._guessDict[pcb.pid] = guess
+        if burst is not None:
+            self._burstDict[pcb.pid] = burst
+
+    ##Vista ordenada de la readyQ (para el diagrama de gantt)
+    @property
+    def readyQ(self):
+        if self._orderedQ is None:
+            self._orderedQ = [entry[2] for entry in sorted(self._readyQ)]
+        return self._orderedQ
+
+
+class ShortestRemainingTimeFirst(ShortestJobFirst):
+
+    ##Como SJF pero ordena por lo que le falta a la rafaga estimada
+    ##y expropia si llega un pcb al que le falta menos que al que esta en CPU.
+    ##Mientras espera, lo que lleva corrido no cambia, asi que la clave del heap no se vuelve vieja.
+    def key(self, pcb):
+        return self.remainingBurst(pcb)
+
+    def remainingBurst(self, pcb):
+        if self._oracle:
+            ## el pc del pcb se guarda al salir de la CPU, se descuenta lo que corrio desde entonces
+            running = self.clock.currentTick - self._runningSince.get(pcb.pid, self.clock.currentTick)
+            return max(self.predictedBurst(pcb) - running, 0)
+        return max(self.predictedBurst(pcb) - self.elapsedBurst(pcb), 0)
+
+    def mustExpropiate(self, pcbInCPU, pcbToAdd):
+        return self.remainingBurst(pcbToAdd) < self.remainingBurst(pcbInCPU)
+
+
 class FileSystem():
 
     def __init__(self):
         self._files = dict()
 
     def write(self, path, prg):
-        log.logger.info("writing file {path} with {prg}".format(path=path, prg=prg))
+        log.info("writing file {path} with {prg}", path=path, prg=prg)
         self._files[path] = prg
 
     # retorna el archivo (o programa) asociado al path
@@ -482,10 +1095,10 @@ class FileSystem():
             prg = self._files[path]
         except:
             prg = None
-            log.logger.info("No file found in path {}".format(path))
+            log.info("No file found in path {}", path)
 
         if not (prg is None):
-            log.logger.info("reading path: {p} ,file found: {f} ".format(p=path,f=prg))
+            log.info("reading path: {p} ,file found: {f} ", p=path,f=prg)
             return prg
 
     def readFromTo(self, path, page, size):
@@ -493,53 +1106,166 @@ class FileSystem():
             prg = self._files[path]
         except:
             prg = None
-            log.logger.info("No file found in path {}".format(path))
+            log.info("No file found in path {}", path)
 
         if not (prg is None):
-            firstInst = page * size
-            lastInst = firstInst + size
-            instr = prg.instructions[firstInst:lastInst]
-            log.logger.info("reading from path: {p}, instructions: {f}".format(p=path, f=instr))
+            instr = prg.page(page, size)
+            log.info("reading from path: {p}, instructions: {f}", p=path, f=log.Lazy(ASM.disassemble, instr))
             return instr
 
+## area de swap: slots del tamaño de un frame en un archivo en disco mapeado en memoria (mmap),
+## un bitmap de slots libres y un indice (pid, pagina) -> slot
+## sacar o traer una pagina es una sola copia entre la memoria y el slot
+## path: archivo de swap (None = un archivo temporal)
+class SwapArea():
+
+    FREE = 1
+    USED = 0
+
+    def __init__(self, slots, frameSize, path=None):
+        self._slots = slots
+        self._slotBytes = frameSize * array('H').itemsize
+        self._index = dict()    # pid -> {pagina: slot} de las paginas del proceso que estan en swap
+        self._free = bytearray([SwapArea.FREE]) * slots
+        self._used = 0
+        self._hint = 0          # desde donde buscar el proximo slot libre
+        self._file = TemporaryFile() if path is None else open(path, 'w+b')
+        self._file.truncate(max(1, slots) * self._slotBytes)
+        self._map = mmap(self._file.fileno(), max(1, slots) * self._slotBytes)
+
+    def isFull(self):
+        return self._used == self._slots
+
+    def contains(self, pid, page):
+        return page in self._index.get(pid, ())
+
+    # guarda la pagina (un array('H') de un frame) y retorna el slot usado
+    def pageOut(self, pid, page, data):
+        slot = self._free.find(SwapArea.FREE, self._hint)
+        if slot < 0:
+            slot = self._free.find(SwapArea.FREE)
+        if slot < 0:
+            raise Exception("swap full: {slots} slots used".format(slots=self._slots))
+        self._free[slot] = SwapArea.USED
+        self._used += 1
+        self._hint = slot + 1
+        self._index.setdefault(pid, dict())[page] = slot
+        offset = slot * self._slotBytes
+        self._map[offset:offset + self._slotBytes] = memoryview(data).cast('B')
+        return slot
+
+    # trae la pagina y libera su slot
+    def pageIn(self, pid, page):
+        slot = self.take(pid, page)
+        if slot is None:
+            raise Exception("No existe en swap: page {pag} de pcb {id}".format(pag=page, id=pid))
+        offset = slot * self._slotBytes
+        data = array('H')
+        data.frombytes(memoryview(self._map)[offset:offset + self._slotBytes])
+        self.freeSlot(slot)
+        return data
+
+    # descarta la pagina sin leerla (por ejemplo si el proceso termino)
+    def discard(self, pid, page):
+        slot = self.take(pid, page)
+        if slot is not None:
+            self.freeSlot(slot)
+
+    # descarta todas las paginas del proceso (solo recorre los slots que usa)
+    def discardProcess(self, pid):
+        for slot in self._index.pop(pid, dict()).values():
+            self.freeSlot(slot)
+
+    # saca la pagina del indice y retorna su slot (o None si no esta en swap)
+    def take(self, pid, page):
+        pages = self._index.get(pid)
+        if pages is None:
+            return None
+        slot = pages.pop(page, None)
+        if not pages:
+            del self._index[pid]
+        return slot
+
+    def freeSlot(self, slot):
+        self._free[slot] = SwapArea.FREE
+        self._used -= 1
+        self._hint = min(self._hint, slot)
+
+    @property
+    def used(self):
+        return self._used
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __repr__(self):
+        return "SwapArea(slots={slots}, used={used})".format(slots=self._slots, used=self._used)
+
+
 class MemoryManager():
 
-    def __init__(self, frameSize, fs, killer):
+    def __init__(self, frameSize, fs, killer, hardware):
         self._fileSystem = fs
+        self._hardware = hardware
         self._frameSize = frameSize
         self._killer = killer
-        #lista de tuplas que recuerda que pcbs tienen paginas en swap
-        #con forma (pid, pageEnSwap)
-        self._inSwap = []
-        self._swap = self.createSwap()
-        self._swapSize = HARDWARE.memory.size // 2
-        self._freeMemory = HARDWARE.memory.size
+        killer.setHardware(hardware)
+        #swap con lugar para la mitad de las paginas que entran en memoria
+        self._swapSize = hardware.memory.size // 2
+        self._swap = SwapArea(self._swapSize, frameSize)
+        self._freeMemory = hardware.memory.size
         self._freeFrames = self.generateFrames()
+        self._totalFrames = len(self._freeFrames)
+        #resident set de cada proceso (None = reemplazo global, sin cuotas, con un solo killer)
+        self._residentSet = None
+        self._killers = dict()             # pid -> killer propio (con residentSet, cada proceso elige sus victimas)
+        self._active = dict()              # pid -> pcb de los procesos que compiten por memoria
+        self._suspended = OrderedDict()    # pid -> pcb sacados de memoria, en orden de suspension
+        self._parked = set()               # pids suspendidos que quisieron correr: esperan que los readmitan
+        self._readAhead = None
+
+    ## activa la lectura anticipada de paginas en los page faults (ver ReadAhead)
+    def setReadAhead(self, readAhead):
+        self._readAhead = readAhead
+        readAhead.setMemoryManager(self)
+
+    @property
+    def readAhead(self):
+        return self._readAhead
+
+    ## activa la administracion del resident set de cada proceso (ver ResidentSetPolicy)
+    ## hay que indicarla antes de correr procesos
+    def setResidentSet(self, policy):
+        self._residentSet = policy
+        policy.setMemoryManager(self)
+
+    @property
+    def residentSet(self):
+        return self._residentSet
+
+    @property
+    def hardware(self):
+        return self._hardware
     
     #SWAP ----
     def isInSwap(self, pid, page):
-        i=0
-        while i < len(self._inSwap) and self._inSwap[i] != (pid, page):
-            i += 1
-        return i < len(self._inSwap)
-        
-    def createSwap(self):
-        self._fileSystem.write("swapFile.sys", [])
-        return "swapFile.sys"
-         
+        return self._swap.contains(pid, page)
+
     def getFromSwap(self, pid, page):
-        swap = self._fileSystem.read(self._swap)
-        i=0
-        while i <len(swap) and not (swap[i][0] == pid and swap[i][1] == page):
-            i+=1
-        if i<len(swap):
-            data = swap[i][2]
-            self._inSwap.pop(i)
-            swap.pop(i)
-        else:
-            raise Exception("No existe en swap: page {pag} de pcb {id}".format(pag=page, id=pid))
-        self._fileSystem.write(self._swap, swap)
-        return data
+        return self._swap.pageIn(pid, page)
+
+    # libera las paginas en swap de un proceso que termino
+    def freeSwap(self, pcb):
+        self._swap.discardProcess(pcb.pid)
+
+    @property
+    def swap(self):
+        return self._swap
+
+    # cierra el archivo de swap (al terminar la simulacion)
+    def close(self):
+        self._swap.close()
 
     #FRAMES----
     # genera los frames iniciales
@@ -550,37 +1276,95 @@ class MemoryManager():
             freeFrames.append(elem)        
         return freeFrames
 
-    def allocFrame(self):
-        if self.framesAvailable() >= 1:                                  # si el nr de frames está disponible
+    # frame para cargar una pagina de pcb (sin pcb, o sin residentSet, el reemplazo es global)
+    def allocFrame(self, pcb=None):
+        if self._residentSet is not None and pcb is not None:
+            allocatedFrame = self.allocFrameFor(pcb)
+        elif self.framesAvailable() >= 1:                                # si el nr de frames está disponible
             allocatedFrame = self._freeFrames.pop(0)                     # guarda los frames a utilizar por el proceso
         else:
-            swap= self._fileSystem.read(self._swap)
-            #hay suficiente espacio en swap
-            if len(swap) < self._swapSize:
-                #Obtiene el pcb y page del frame a matar
-                toKill = self._killer.nextToKill()
-                #crea una tuple que tenga la data para el swap (pid, page, data)
-                frameToKill = (toKill[0].pid, toKill[1], self.dataToKill(toKill[2]))
-                #guarda en el swap y al in swap, luego actualiza el archivo swap
-                swap.append(frameToKill)
-                self._inSwap.append((frameToKill[0], frameToKill[1]))
-                self._fileSystem.write(self._swap, swap)
-                #liberado el frame, lo guarda para retornarlo
-                allocatedFrame = toKill[2]
-                log.logger.info("Swap needed")
-            else:
-                # si no hay frames disponibles y no hay espacio en swap lanza excepción
-                raise Exception("memory full: frames available = {fa}, required frames = {fr}".format(fa=self.framesAvailable(), fr=frames))
-        log.logger.info("allocatedFr = {}".format(allocatedFrame))   # los muestra en pantalla
-        log.logger.info("freeFrames = {}".format(self._freeFrames))   # muestra los frames libres restantes
+            allocatedFrame = self.evict(self._killer)
+        log.info("allocatedFr = {}", allocatedFrame)   # los muestra en pantalla
+        log.info("freeFrames = {}", self._freeFrames)   # muestra los frames libres restantes
         return allocatedFrame                                       # retorna los frames a utilizar
 
+    # frame para pcb respetando las cuotas: la politica actualiza la cuota del proceso
+    # (y puede liberar paginas suyas), se suspenden procesos si las cuotas no entran en memoria,
+    # y si el proceso ya tiene su cuota reemplaza una pagina propia
+    def allocFrameFor(self, pcb):
+        self._active[pcb.pid] = pcb
+        self._residentSet.pageFault(pcb)
+        self.suspendWhileOvercommitted(pcb)
+        resident = len(pcb.pageTable)
+        if resident and resident >= self._residentSet.quota(pcb):
+            return self.evict(self.killerOf(pcb))
+        if self._freeFrames:
+            return self._freeFrames.pop(0)
+        if resident and self._residentSet.local:
+            return self.evict(self.killerOf(pcb))
+        return self.evict(self.killerOf(self.globalVictim()))
+
+    # frame libre para pcb sin desalojar ni suspender a nadie
+    # (None si no hay frames libres o si el proceso ya tiene su cuota)
+    def allocFreeFrame(self, pcb):
+        if not self._freeFrames:
+            return None
+        if self._residentSet is not None and len(pcb.pageTable) >= self._residentSet.quota(pcb):
+            return None
+        return self._freeFrames.pop(0)
+
+    # con reemplazo global la victima sale del proceso mas excedido de su cuota
+    def globalVictim(self):
+        candidates = [pcb for pcb in self._active.values() if pcb.pageTable]
+        return max(candidates, key=lambda pcb: (len(pcb.pageTable) - self._residentSet.quota(pcb), len(pcb.pageTable)))
+
+    # desaloja la victima que elige killer y retorna el frame liberado
+    def evict(self, killer):
+        #Obtiene el pcb y page del frame a matar
+        toKill = killer.nextToKill()
+        self.pageOut(toKill[0], toKill[1], toKill[2])
+        #liberado el frame, lo retorna
+        return toKill[2]
+
+    # saca de memoria la pagina (ya fuera de la page table del pcb)
+    def pageOut(self, pcb, page, frame):
+        #si la pagina es del proceso en ejecucion, el MMU no debe seguir traduciendola
+        for core in self._hardware.cores:
+            core.mmu.invalidate(pcb.pageTable, page)
+        self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_SWAP_OUT, pcb.pid, page, frame)
+        #una pagina limpia se descarta (se vuelve a leer del programa), una sucia se guarda en el swap
+        if self._hardware.frameFlags.isDirty(frame):
+            if self._swap.isFull():
+                # si no hay frames disponibles y no hay espacio en swap lanza excepción
+                raise Exception("memory full: frames available = {fa}, required frames = {fr}".format(fa=self.framesAvailable(), fr=1))
+            self._swap.pageOut(pcb.pid, page, self.dataToKill(frame))
+            log.info("Swap needed")
+
+    # saca de memoria una pagina del proceso y deja su frame libre
+    def release(self, pcb, page):
+        frame = pcb.pageTable[page]
+        self.killerOf(pcb).removeFrame(frame)
+        pcb.removePageFromTable(page)
+        self.pageOut(pcb, page, frame)
+        self._freeFrames.insert(0, frame)
+
+    # el killer que elige las victimas entre las paginas de pcb
+    def killerOf(self, pcb):
+        if self._residentSet is None:
+            return self._killer
+        killer = self._killers.get(pcb.pid)
+        if killer is None:
+            killer = self._killer.clone()
+            killer.setHardware(self._hardware)
+            self._killers[pcb.pid] = killer
+        return killer
+
+    # se cargo la pagina de pcb en el frame: pasa a ser candidata a victima
+    def newFrame(self, pcb, page, frame):
+        self.killerOf(pcb).newFrame(pcb, page, frame)
+
     def dataToKill(self, frame):
-        data = []
-        for i in range(self._frameSize):
-            direccion = frame * self._frameSize + i
-            data.append(HARDWARE.memory.read(direccion))
-        return data
+        return self._hardware.memory.read_block(frame * self._frameSize, self._frameSize)
 
     def freeMemory(self):
         return self._freeFrames * self._frameSize
@@ -589,88 +1373,527 @@ class MemoryManager():
     def frameSize(self):
         return self._frameSize
 
+    @property
+    def totalFrames(self):
+        return self._totalFrames
+
     @property
     def freeFrames(self):
         return self._freeFrames
 
-    def freeFrames(self, frames):
+    def freeFrames(self, frames, killer=None):
+        killer = self._killer if killer is None else killer
         for frame in frames:
             self._freeFrames.insert(0, frame)
-        log.logger.info("freeFrames = {}".format(self._freeFrames))  # muestra los frames libres restantes
+            # el frame ya no puede ser elegido como victima
+            killer.removeFrame(frame)
+        log.info("freeFrames = {}", self._freeFrames)  # muestra los frames libres restantes
+
+    # libera toda la memoria de un proceso que termino: frames, swap y cuota
+    def freeProcess(self, pcb):
+        self.freeFrames(pcb.pageTable.values(), self.killerOf(pcb))
+        self.freeSwap(pcb)
+        self._killers.pop(pcb.pid, None)
+        self._active.pop(pcb.pid, None)
+        self._suspended.pop(pcb.pid, None)
+        self._parked.discard(pcb.pid)
+        if self._residentSet is not None:
+            self._residentSet.forget(pcb)
+        if self._readAhead is not None:
+            self._readAhead.forget(pcb)
 
     def framesAvailable(self):
         return len(self._freeFrames)
+
+    #SUSPENSION ----
+    # frames que suman las cuotas de los procesos activos
+    def committed(self):
+        return sum(self._residentSet.quota(pcb) for pcb in self._active.values())
+
+    # mientras las cuotas no entren en memoria suspende al proceso (que no este corriendo)
+    # con el resident set mas grande
+    def suspendWhileOvercommitted(self, pcb):
+        while self.committed() > self._totalFrames:
+            candidates = [other for other in self._active.values() if other is not pcb and other.state != RUNNING]
+            if not candidates:
+                break
+            self.suspend(max(candidates, key=lambda other: (len(other.pageTable), self._residentSet.quota(other))))
+
+    # saca de memoria todas las paginas del proceso: no vuelve a correr hasta que lo readmitan
+    def suspend(self, pcb):
+        freed = len(pcb.pageTable)
+        for page in list(pcb.pageTable):
+            self.release(pcb, page)
+        del self._active[pcb.pid]
+        self._suspended[pcb.pid] = pcb
+        self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_SUSPEND, pcb.pid, freed)
+        log.info("Suspended pcb {pid}: {freed} frames", pid=pcb.pid, freed=freed)
+
+    def isSuspended(self, pcb):
+        return pcb.pid in self._suspended
+
+    # un proceso suspendido que iba a correr queda esperando que lo readmitan
+    def park(self, pcb):
+        if pcb.pid not in self._suspended:
+            return False
+        self._parked.add(pcb.pid)
+        return True
+
+    # readmite procesos suspendidos (en orden) mientras sus cuotas entren en memoria
+    # (si no queda ningun proceso activo admite al menos uno)
+    # retorna los que quisieron correr mientras estaban suspendidos, para volver a planificarlos
+    def readmit(self):
+        resumed = []
+        while self._suspended:
+            pid, pcb = next(iter(self._suspended.items()))
+            quota = self._residentSet.quota(pcb)
+            if self._active and self.committed() + quota > self._totalFrames:
+                break
+            del self._suspended[pid]
+            self._active[pid] = pcb
+            self._hardware.tracer.record(self._hardware.clock.currentTick, EVENT_RESUME, pid, quota)
+            if pid in self._parked:
+                self._parked.discard(pid)
+                resumed.append(pcb)
+        return resumed
     
     #killer
     def killAlgorithm(self):
         return self._killer
 
 
+## politicas de resident set: cuantos frames le corresponden a cada proceso (su cuota)
+## el memory manager las consulta en cada page fault: si el proceso ya tiene su cuota
+## reemplaza una pagina propia, si no toma un frame libre (o, sin frames libres, con reemplazo
+## global le saca uno al proceso mas excedido); si las cuotas no entran en memoria suspende procesos
+## local=True hace que sin frames libres un proceso solo reemplace paginas propias
+## la base es asignacion fija: todos tienen minFrames frames
+class ResidentSetPolicy():
+
+    def __init__(self, minFrames=2, local=True):
+        self._minFrames = minFrames
+        self._local = local
+        self._quotas = dict()
+        self._mm = None
+
+    def setMemoryManager(self, mm):
+        self._mm = mm
+
+    @property
+    def local(self):
+        return self._local
+
+    def quota(self, pcb):
+        return self._quotas.get(pcb.pid, self._minFrames)
+
+    # page fault de pcb: actualiza su cuota (puede liberar paginas con mm.release)
+    def pageFault(self, pcb):
+        pass
+
+    def forget(self, pcb):
+        self._quotas.pop(pcb.pid, None)
+
+    def __repr__(self):
+        return "{name}(local={local}, quotas={quotas})".format(name=type(self).__name__, local=self._local, quotas=self._quotas)
+
+## Working Set: en cada page fault se liberan las paginas del proceso que no se usaron
+## en los ultimos "window" accesos a memoria (contando los de todos los procesos)
+## y la cuota es lo que queda (su working set) mas la pagina que se esta cargando
+class WorkingSetPolicy(ResidentSetPolicy):
+
+    def __init__(self, window=20, minFrames=2, local=True):
+        super(WorkingSetPolicy, self).__init__(minFrames, local)
+        self._window = window
+
+    def pageFault(self, pcb):
+        flags = self._mm.hardware.frameFlags
+        for page, frame in list(pcb.pageTable.items()):
+            if flags.accesses - flags.lastUse(frame) >= self._window:
+                self._mm.release(pcb, page)
+        self._quotas[pcb.pid] = min(self._mm.totalFrames, max(self._minFrames, len(pcb.pageTable) + 1))
+
+## Page Fault Frequency: mide los accesos a memoria entre page faults del proceso;
+## si son menos que lower (falla muy seguido) le suma un frame a la cuota, si son mas que upper
+## libera las paginas que no uso desde el page fault anterior y ajusta la cuota a las que quedan
+class PageFaultFrequencyPolicy(ResidentSetPolicy):
+
+    def __init__(self, lower=4, upper=16, minFrames=2, local=True):
+        super(PageFaultFrequencyPolicy, self).__init__(minFrames, local)
+        self._lower = lower
+        self._upper = upper
+        self._lastFault = dict()
+
+    def pageFault(self, pcb):
+        flags = self._mm.hardware.frameFlags
+        quota = self.quota(pcb)
+        lastFault = self._lastFault.get(pcb.pid)
+        if lastFault is not None:
+            interval = flags.accesses - lastFault
+            if interval < self._lower:
+                quota += 1
+            elif interval > self._upper:
+                for page, frame in list(pcb.pageTable.items()):
+                    if not flags.isReferenced(frame):
+                        self._mm.release(pcb, page)
+                quota = len(pcb.pageTable) + 1
+        # el bit de referencia pasa a indicar si la pagina se uso desde este page fault
+        for frame in pcb.pageTable.values():
+            flags.clearReferenced(frame)
+        self._lastFault[pcb.pid] = flags.accesses
+        self._quotas[pcb.pid] = min(self._mm.totalFrames, max(self._minFrames, quota))
+
+    def forget(self, pcb):
+        super(PageFaultFrequencyPolicy, self).forget(pcb)
+        self._lastFault.pop(pcb.pid, None)
+
+
+## lectura anticipada: en cada page fault se cargan tambien las paginas siguientes del proceso
+## (solo en frames libres), hasta una ventana por proceso que arranca en "window" paginas.
+## con adaptive=True en cada page fault se mira que paso con las paginas anticipadas antes:
+## si se usaron todas la ventana se duplica (hasta maxWindow), y si alguna se desalojo
+## sin usarse se reduce a la mitad (hasta minWindow)
+class ReadAhead():
+
+    def __init__(self, window=2, maxWindow=8, minWindow=1, adaptive=True):
+        self._initialWindow = window
+        self._maxWindow = maxWindow
+        self._minWindow = minWindow
+        self._adaptive = adaptive
+        self._windows = dict()     # pid -> ventana actual
+        self._pending = dict()     # pid -> {pagina: frame} anticipadas que todavia no se usaron
+        self._prefetches = 0
+        self._used = 0
+        self._wasted = 0
+        self._mm = None
+
+    def setMemoryManager(self, mm):
+        self._mm = mm
+
+    def window(self, pcb):
+        return self._windows.get(pcb.pid, self._initialWindow)
+
+    # paginas a anticipar despues del page fault de pcb en page (ajusta antes la ventana)
+    def pagesAfter(self, pcb, page):
+        window = self.window(pcb)
+        pending = self._pending.get(pcb.pid)
+        if pending:
+            flags = self._mm.hardware.frameFlags
+            used = wasted = 0
+            for pendingPage, frame in list(pending.items()):
+                if pcb.pageTable.get(pendingPage) != frame:
+                    # se desalojo antes de usarse
+                    wasted += 1
+                    del pending[pendingPage]
+                elif flags.uses(frame) > 0:
+                    used += 1
+                    del pending[pendingPage]
+            self._used += used
+            self._wasted += wasted
+            if self._adaptive:
+                if wasted:
+                    window = max(self._minWindow, window // 2)
+                elif used and not pending:
+                    window = min(self._maxWindow, window * 2)
+                self._windows[pcb.pid] = window
+        lastPage = pcb.limit // self._mm.frameSize
+        return [nextPage for nextPage in range(page + 1, min(page + window, lastPage) + 1) if nextPage not in pcb.pageTable]
+
+    def prefetched(self, pcb, page, frame):
+        self._pending.setdefault(pcb.pid, dict())[page] = frame
+        self._prefetches += 1
+
+    def forget(self, pcb):
+        self._windows.pop(pcb.pid, None)
+        self._pending.pop(pcb.pid, None)
+
+    ## paginas anticipadas, cuantas se usaron y cuantas se desalojaron sin usarse
+    @property
+    def prefetches(self):
+        return self._prefetches
+
+    @property
+    def used(self):
+        return self._used
+
+    @property
+    def wasted(self):
+        return self._wasted
+
+    def __repr__(self):
+        return "ReadAhead(prefetches={p}, used={u}, wasted={w}, windows={windows})".format(p=self._prefetches, u=self._used, w=self._wasted, windows=self._windows)
+
+
+## algoritmos de seleccion de victima: llevan los frames ocupados (frame -> (pcb, pagina))
+## en orden de carga y eligen cual desalojar mirando los flags que mantiene el MMU
 class KillAlgorithm():
 
     def __init__(self):
-        self._orderPcb = []
-    
+        self._frames = OrderedDict()
+        self._hardware = None
+        self._flags = None
+
+    # el memory manager le pasa el hardware (para leer los flags de los frames)
+    def setHardware(self, hardware):
+        self._hardware = hardware
+        self._flags = hardware.frameFlags
+
+    # otra instancia con la misma configuracion (para elegir victimas entre las paginas de otro proceso)
+    def clone(self):
+        return type(self)()
+
     def newFrame(self, pcb, page, frame):
-        self._orderPcb.append((pcb, page, frame))
+        self._frames[frame] = (pcb, page)
 
-class KillFifo(KillAlgorithm):
+    # olvida un frame liberado (por ejemplo al terminar el proceso)
+    def removeFrame(self, frame):
+        self._frames.pop(frame, None)
+
+    # desaloja la pagina del frame elegido y retorna (pcb, pagina, frame)
+    def kill(self, frame):
+        pcb, page = self._frames.pop(frame)
+        pcb.removePageFromTable(page)
+        return (pcb, page, frame)
 
     def nextToKill(self):
-        toKill = self._orderPcb.pop(0)
-        toKill[0].removePageFromTable(toKill[1])
-        return toKill
+        return self.kill(self.victim())
+
+    def victim(self):
+        raise Exception("victim not implemented for {}".format(type(self).__name__))
+
+    def __repr__(self):
+        return "{name}({frames})".format(name=type(self).__name__, frames=list(self._frames))
+
+class KillFifo(KillAlgorithm):
+
+    def victim(self):
+        return next(iter(self._frames))
+
+## Second Chance con la lista de frames como reloj: la aguja es el primero,
+## si esta referenciado se le baja el bit y pasa al final
+## (la aguja avanza mientras busca: la lista queda rotada sin una segunda pasada)
+class KillClock(KillAlgorithm):
+
+    def victim(self):
+        # a lo sumo una vuelta: despues el primero ya no esta referenciado
+        while True:
+            frame = next(iter(self._frames))
+            if not self._flags.isReferenced(frame):
+                return frame
+            self._flags.clearReferenced(frame)
+            self._frames.move_to_end(frame)
+
+## Enhanced Second Chance: clases (referenced, dirty), primero busca (0, 0) sin tocar bits,
+## despues (0, 1) bajando el bit referenced a los que pasa, y repite
+## (prefiere desalojar paginas limpias, que no necesitan escribirse en swap)
+## O(frames) por desalojo en el peor caso, a proposito: el MMU cambia los bits sin avisarle
+## al algoritmo, asi que las clases solo se conocen mirando los frames
+class KillEnhancedSecondChance(KillAlgorithm):
+
+    def victim(self):
+        if not self._frames:
+            raise Exception("no frames to kill")
+        while True:
+            # cada vuelta deja la aguja donde estaba, salvo que encuentre victima
+            for _ in range(len(self._frames)):
+                frame = next(iter(self._frames))
+                if not self._flags.isReferenced(frame) and not self._flags.isDirty(frame):
+                    return frame
+                self._frames.move_to_end(frame)
+            for _ in range(len(self._frames)):
+                frame = next(iter(self._frames))
+                if not self._flags.isReferenced(frame):
+                    return frame
+                self._flags.clearReferenced(frame)
+                self._frames.move_to_end(frame)
+
+## Not Recently Used: desaloja un frame de la clase mas baja (2 * referenced + dirty),
+## y cada resetTicks ticks baja los bits referenced de todos los frames
+## recorre los frames en cada desalojo y en cada reset (O(frames)): como los bits los pone
+## el MMU en cada acceso, no se pueden llevar las cuatro clases armadas de antemano
+class KillNRU(KillAlgorithm):
+
+    def __init__(self, resetTicks=10):
+        super(KillNRU, self).__init__()
+        self._resetTicks = resetTicks
+        self._nextReset = resetTicks
+
+    def clone(self):
+        return KillNRU(self._resetTicks)
+
+    def resetIfDue(self):
+        tick = self._hardware.clock.currentTick
+        if tick >= self._nextReset:
+            for frame in self._frames:
+                self._flags.clearReferenced(frame)
+            self._nextReset = tick + self._resetTicks
+
+    def frameClass(self, frame):
+        return 2 * self._flags.isReferenced(frame) + self._flags.isDirty(frame)
+
+    def victim(self):
+        self.resetIfDue()
+        victim, victimClass = None, 4
+        for frame in self._frames:
+            frameClass = self.frameClass(frame)
+            if frameClass < victimClass:
+                victim, victimClass = frame, frameClass
+                if frameClass == 0:
+                    break
+        return victim
+
+## base para los algoritmos que eligen el frame de menor clave, con claves que solo crecen
+## mientras la pagina esta cargada (las actualiza el MMU en cada acceso, sin avisar):
+## el heap guarda la clave que tenia cada frame al encolarlo, y al elegir victima si la clave
+## del tope esta vieja se reencola con la actual (cada frame tiene una sola entrada vigente)
+## las entradas de frames liberados quedan en el heap hasta salir: cuando son mas que las
+## vigentes se rearma el heap solo con las vigentes (el heap no pasa de 2 entradas por frame)
+class KillByKey(KillAlgorithm):
+
+    def __init__(self):
+        super(KillByKey, self).__init__()
+        self._heap = []
+        self._entries = dict()
+        self._seq = count()
+        self._stale = 0         # entradas del heap que ya no estan en _entries
+
+    def key(self, frame):
+        raise Exception("key not implemented for {}".format(type(self).__name__))
+
+    def push(self, frame):
+        entry = [self.key(frame), next(self._seq), frame]
+        if frame in self._entries:
+            self._stale += 1
+        self._entries[frame] = entry
+        heappush(self._heap, entry)
+        self.compactIfStale()
+
+    def newFrame(self, pcb, page, frame):
+        super(KillByKey, self).newFrame(pcb, page, frame)
+        self.push(frame)
+
+    def removeFrame(self, frame):
+        super(KillByKey, self).removeFrame(frame)
+        if self._entries.pop(frame, None) is not None:
+            self._stale += 1
+            self.compactIfStale()
+
+    # rearma el heap sin las entradas viejas cuando son mas que las vigentes
+    def compactIfStale(self):
+        if self._stale > len(self._entries):
+            self._heap = list(self._entries.values())
+            heapify(self._heap)
+            self._stale = 0
+
+    # entradas en el heap, contando las viejas que todavia no salieron
+    @property
+    def heapSize(self):
+        return len(self._heap)
+
+    def victim(self):
+        while True:
+            entry = heappop(self._heap)
+            frame = entry[2]
+            if self._entries.get(frame) is not entry:
+                # entrada de un frame liberado o reencolado
+                self._stale -= 1
+                continue
+            if entry[0] == self.key(frame):
+                del self._entries[frame]
+                return frame
+            self.push(frame)
+
+## Least Recently Used: el frame con el ultimo acceso mas viejo
+class KillLRU(KillByKey):
+
+    def key(self, frame):
+        return self._flags.lastUse(frame)
+
+## Least Frequently Used: el frame con menos accesos desde que se cargo (empate: el menos reciente)
+class KillLFU(KillByKey):
+
+    def key(self, frame):
+        return (self._flags.uses(frame), self._flags.lastUse(frame))
 
 
 # emulates the core of an Operative System
+## sch es un scheduler, o una lista con un scheduler por nucleo (cada nucleo tiene su readyQ)
+## hardware es la maquina donde corre y designer donde registra el diagrama de gantt
+## (por default los globales: para tener varias simulaciones en el mismo proceso
+##  cada kernel recibe su propio Hardware() y LoggerDesign())
 class Kernel():
 
-    def __init__(self, sch, frames, killer):
+    def __init__(self, sch, frames, killer, hardware=HARDWARE, designer=DESIGNER):
+        self._hardware = hardware
+        self._designer = designer
+
         ## setup interruption handlers
         killHandler = KillInterruptionHandler(self)
-        HARDWARE.interruptVector.register(KILL_INTERRUPTION_TYPE, killHandler)
+        hardware.interruptVector.register(KILL_INTERRUPTION_TYPE, killHandler)
 
         ioInHandler = IoInInterruptionHandler(self)
-        HARDWARE.interruptVector.register(IO_IN_INTERRUPTION_TYPE, ioInHandler)
+        hardware.interruptVector.register(IO_IN_INTERRUPTION_TYPE, ioInHandler)
 
         ioOutHandler = IoOutInterruptionHandler(self)
-        HARDWARE.interruptVector.register(IO_OUT_INTERRUPTION_TYPE, ioOutHandler)
+        hardware.interruptVector.register(IO_OUT_INTERRUPTION_TYPE, ioOutHandler)
 
         newHandler = NewInterruptionHandler(self)
-        HARDWARE.interruptVector.register(NEW_INTERRUPTION_TYPE, newHandler)
+        hardware.interruptVector.register(NEW_INTERRUPTION_TYPE, newHandler)
 
         timeoutHandler = TimeoutInterruptionHandler(self)
-        HARDWARE.interruptVector.register(TIMEOUT_INTERRUPTION_TYPE, timeoutHandler)
+        hardware.interruptVector.register(TIMEOUT_INTERRUPTION_TYPE, timeoutHandler)
 
         statHandler = StatInterruptionHandler(self)
-        HARDWARE.interruptVector.register(STAT_INTERRUPTION_TYPE, statHandler)
+        hardware.interruptVector.register(STAT_INTERRUPTION_TYPE, statHandler)
 
         pageFaultHandler = PageFaultInterruptionHandler(self)
-        HARDWARE.interruptVector.register(PAGE_FAULT_INTERRUPTION_TYPE, pageFaultHandler)
+        hardware.interruptVector.register(PAGE_FAULT_INTERRUPTION_TYPE, pageFaultHandler)
 
         self._fileSystem = FileSystem()
 
         ## controls the Hardware's I/O Device
-        self._ioDeviceController = IoDeviceController(HARDWARE.ioDevice)
+        self._ioDeviceController = IoDeviceController(hardware.ioDevice, hardware)
 
         # tabla PCB
-        self._pcbTable = PCBTable()
+        self._pcbTable = PCBTable(len(hardware.cores))
 
         # dispatcher
-        self._dispatcher = Dispatcher()
+        self._dispatcher = Dispatcher(hardware)
 
-        # scheduler
-        self._scheduler = sch
+        # schedulers (uno por nucleo)
+        self._schedulers = sch if isinstance(sch, list) else [sch]
+        if len(self._schedulers) != len(hardware.cores):
+            raise Exception("Expected {cores} schedulers (one per core), got {count}".format(cores=len(hardware.cores), count=len(self._schedulers)))
+        for scheduler, core in zip(self._schedulers, hardware.cores):
+            scheduler.setFileSystem(self._fileSystem)
+            scheduler.setHardware(hardware, core)
 
         # configuración frames
-        self._mm = MemoryManager(frames, self._fileSystem, killer)
-        HARDWARE.mmu.frameSize = frames
+        self._mm = MemoryManager(frames, self._fileSystem, killer, hardware)
+        hardware.setFrameSize(frames)
 
         # loader
-        self._loader = Loader(self._mm, self._fileSystem)
+        self._loader = Loader(self._mm, self._fileSystem, hardware)
+
+    ## libera lo que el kernel tiene abierto (el archivo de swap); tambien se puede usar
+    ## como context manager: with Kernel(...) as kernel: ...
+    def shutdown(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, excType, excValue, traceback):
+        self.shutdown()
 
     # getters para obtenerlos desde otras clases
+    @property
+    def hardware(self):
+        return self._hardware
+
+    @property
+    def designer(self):
+        return self._designer
+
     @property
     def loader(self):
         return self._loader
@@ -683,9 +1906,43 @@ class Kernel():
     def dispatcher(self):
         return self._dispatcher
 
+    # scheduler del nucleo 0
     @property
     def scheduler(self):
-        return self._scheduler
+        return self._schedulers[0]
+
+    @property
+    def schedulers(self):
+        return self._schedulers
+
+    # readyQs de todos los nucleos (para el diagrama de gantt)
+    @property
+    def readyQ(self):
+        if len(self._schedulers) == 1:
+            return self._schedulers[0].readyQ
+        return [pcb for scheduler in self._schedulers for pcb in scheduler.readyQ]
+
+    ## balanceo de carga: un nucleo libre (de ser posible en el que corrio por ultima vez el pcb),
+    ## y si estan todos ocupados el de readyQ mas corta
+    def chooseCore(self, pcb):
+        cores = range(len(self._schedulers))
+        idle = [core for core in cores if not self._pcbTable.isRunningPCB(core)]
+        if idle:
+            return pcb.core if pcb.core in idle else idle[0]
+        return min(cores, key=lambda core: (self._schedulers[core].size(), core != pcb.core))
+
+    # el pcb pasa a planificarse en el nucleo core: su historia (nivel, vruntime, rafagas estimadas)
+    # esta siempre en el scheduler de pcb.core, y se pasa al del nucleo nuevo
+    def migrate(self, pcb, core):
+        if pcb.core is not None and pcb.core != core:
+            source = self._schedulers[pcb.core]
+            target = self._schedulers[core]
+            target.giveHistory(pcb, source.takeHistory(pcb))
+        pcb.setCore(core)
+
+    # scheduler del nucleo con mas pcbs esperando (para robarle trabajo)
+    def busiestScheduler(self):
+        return max(self._schedulers, key=lambda scheduler: scheduler.size())
 
     @property
     def ioDeviceController(self):
@@ -702,11 +1959,16 @@ class Kernel():
     ## emulates a "system call" for programs execution
     def run(self, path, priority):
         newIRQ = IRQ(NEW_INTERRUPTION_TYPE, [path, priority])
-        HARDWARE.cpu._interruptVector.handle(newIRQ)
+        self._hardware.interruptVector.handle(newIRQ)
 
     def runWithDelay(self, path, priority, ticks):
-        sleep(ticks)
-        self.run(path, priority)
+        clock = self._hardware.clock
+        if clock.headless:
+            # sin tiempo real, el arribo se agenda como evento del clock
+            clock.schedule(clock.currentTick + ticks, lambda: self.run(path, priority))
+        else:
+            sleep(ticks)
+            self.run(path, priority)
 
     def __repr__(self):
         return "Kernel "
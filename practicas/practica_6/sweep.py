@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+import csv
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import product
+from tabulate import tabulate
+from hardware import *
+from so import *
+from designer import LoggerDesign
+from metrics import summary
+
+## Barrido de parametros: corre una simulacion por cada combinacion de la grilla,
+## cada una con su propio Hardware, Kernel y LoggerDesign, repartidas en un pool de procesos
+## (o de threads, que evita arrancar procesos y serializar resultados),
+## y junta las metricas de todas en una sola tabla.
+##
+##  configs = grid(scheduler=['fcfs', 'rr'], quantum=[2, 4], frameSize=[2, 4])
+##  rows = sweep(configs)
+##  printTable(rows)
+
+
+## schedulers por nombre, armados a partir del quantum de la configuracion
+SCHEDULERS = {
+    'fcfs': lambda quantum: FCFSScheduler(),
+    'prio': lambda quantum: PriorityScheduler(),
+    'pprio': lambda quantum: PreemptivePriorityScheduler(),
+    'rr': lambda quantum: RoundRobin(quantum),
+    'mlfq': lambda quantum: MultilevelFeedbackQueue([quantum, quantum * 2, None]),
+    'cfs': lambda quantum: CompletelyFairScheduler(minGranularity=quantum),
+    'sjf': lambda quantum: ShortestJobFirst(),
+    'srtf': lambda quantum: ShortestRemainingTimeFirst(),
+}
+
+## algoritmos de reemplazo de paginas por nombre
+KILLERS = {
+    'fifo': KillFifo,
+    'lru': KillLRU,
+    'clock': KillClock,
+    'esc': KillEnhancedSecondChance,
+    'lfu': KillLFU,
+    'nru': KillNRU,
+}
+
+## politicas de resident set por nombre, armadas segun si el reemplazo es local
+RESIDENT_SETS = {
+    'none': lambda local: None,
+    'fixed': lambda local: ResidentSetPolicy(local=local),
+    'ws': lambda local: WorkingSetPolicy(local=local),
+    'pff': lambda local: PageFaultFrequencyPolicy(local=local),
+}
+
+
+## cargas de trabajo por nombre: lista de (path, programa, prioridad, tick de arribo)
+def guiaWorkload():
+    return [
+        ("c:/prog1.exe", Program("prg1.exe", [ASM.CPU(2), ASM.IO(), ASM.CPU(3), ASM.IO(), ASM.CPU(2)]), 1, 0),
+        ("c:/prog2.exe", Program("prg2.exe", [ASM.CPU(7)]), 2, 1),
+        ("c:/prog3.exe", Program("prg3.exe", [ASM.CPU(4), ASM.IO(), ASM.CPU(1)]), 1, 0),
+        ("c:/prog4.exe", Program("prg4.exe", [ASM.CPU(3)]), 5, 0),
+    ]
+
+# procesos interactivos (rafagas cortas con IO) mezclados con procesos batch (solo CPU)
+def mixedWorkload():
+    workload = []
+    for i in range(6):
+        interactive = Program("int{}.exe".format(i), [ASM.CPU(2), ASM.IO(), ASM.CPU(3), ASM.IO(), ASM.CPU(2), ASM.IO(), ASM.CPU(1)])
+        workload.append(("c:/int{}.exe".format(i), interactive, 1, i * 3))
+    for i in range(3):
+        batch = Program("batch{}.exe".format(i), [ASM.CPU(30 + i * 10)])
+        workload.append(("c:/batch{}.exe".format(i), batch, 3, i * 5))
+    return workload
+
+# solo procesos de CPU de distintos largos
+def cpuWorkload():
+    return [("c:/cpu{}.exe".format(i), Program("cpu{}.exe".format(i), [ASM.CPU(5 + (i * 7) % 23)]), i % 3, i * 2) for i in range(10)]
+
+WORKLOADS = {
+    'guia': guiaWorkload,
+    'mixed': mixedWorkload,
+    'cpu': cpuWorkload,
+}
+
+## valores por default de cada parametro de la grilla
+DEFAULTS = {
+    'scheduler': 'fcfs',
+    'quantum': 3,
+    'frameSize': 4,
+    'memorySize': 64,
+    'killer': 'fifo',
+    'residentSet': 'none',
+    'local': True,
+    'readAhead': 0,
+    'workload': 'guia',
+    'cores': 1,
+    'maxTicks': 10000,
+}
+
+## columnas de la tabla de resultados (ademas de los parametros)
+RESULT_FIELDS = ['ticks', 'finished', 'utilization', 'throughput', 'waiting', 'turnaround', 'response', 'p90turnaround', 'pageFaults', 'tlbHitRatio', 'error']
+
+
+# todas las combinaciones de los valores dados (los parametros no dados toman el default)
+def grid(**params):
+    names = list(DEFAULTS)
+    values = [params.get(name, [DEFAULTS[name]]) for name in names]
+    return [dict(zip(names, combination)) for combination in product(*values)]
+
+
+# arma el kernel de la configuracion sobre hardware (ya con setup hecho) y la corre hasta que
+# terminan todos los procesos o pasan maxTicks ticks
+def simulate(config, hardware, designer):
+    schedulers = [SCHEDULERS[config['scheduler']](config['quantum']) for core in hardware.cores]
+    kernel = Kernel(schedulers, config['frameSize'], KILLERS[config['killer']](), hardware, designer)
+    try:
+        residentSet = RESIDENT_SETS[config['residentSet']](config['local'])
+        if residentSet is not None:
+            kernel.memoryManager.setResidentSet(residentSet)
+        # ventana inicial de la lectura anticipada (0 = sin lectura anticipada)
+        if config['readAhead']:
+            kernel.memoryManager.setReadAhead(ReadAhead(config['readAhead']))
+        for path, program, priority, arrival in WORKLOADS[config['workload']]():
+            kernel.fileSystem.write(path, program)
+            if arrival:
+                kernel.runWithDelay(path, priority, arrival)
+            else:
+                kernel.run(path, priority)
+        hardware.clock.stopWhen(kernel.pcbTable.allTerminated)
+        hardware.clock.do_ticks(config['maxTicks'])
+    except Exception:
+        # el kernel no le llega a quien llamo: se cierra aca
+        kernel.shutdown()
+        raise
+    # quien llama tiene que cerrarlo (kernel.shutdown() o with)
+    return kernel
+
+# corre una simulacion completa (headless y salteando ticks sin eventos) y retorna su renglon de resultados
+def runConfig(config):
+    row = dict(config)
+    try:
+        hardware = Hardware()
+        designer = LoggerDesign()
+        hardware.setup(config['memorySize'], headless=True, eventDriven=True, cores=config['cores'])
+        hardware.cpu.enable_stats = True
+        with simulate(config, hardware, designer) as kernel:
+            # cada tick se registra antes de ejecutarse: una columna mas deja registrado como termino la corrida
+            designer.recordGantt(kernel.pcbTable, kernel.readyQ, hardware.clock.currentTick + 1)
+
+            stats = summary(designer.recorder, config['cores'])
+            lookups = sum(core.mmu.tlb.hits + core.mmu.tlb.misses for core in hardware.cores)
+            row.update({
+                'ticks': stats['ticks'],
+                'finished': stats['finished'],
+                'utilization': stats['utilization'],
+                'throughput': stats['throughput'],
+                'waiting': stats['waiting']['mean'],
+                'turnaround': stats['turnaround']['mean'],
+                'response': stats['response']['mean'],
+                'p90turnaround': stats['turnaround']['p90'],
+                'pageFaults': sum(core.mmu.pageFaults for core in hardware.cores),
+                'tlbHitRatio': sum(core.mmu.tlb.hits for core in hardware.cores) / lookups if lookups else 0.0,
+                'error': '',
+            })
+    except Exception as e:
+        # una configuracion invalida (ej: memoria muy chica) no corta el barrido
+        row.update({field: None for field in RESULT_FIELDS})
+        row['error'] = "{}: {}".format(type(e).__name__, e)
+    return row
+
+
+# corre todas las configuraciones en paralelo (workers=None usa un proceso por CPU)
+# y retorna los renglones en el mismo orden que las configuraciones
+# threads=True las corre en threads del mismo proceso
+def sweep(configs, workers=None, threads=False):
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor(max_workers=workers) as pool:
+        return list(pool.map(runConfig, configs, chunksize=max(1, len(configs) // 64)))
+
+
+# columnas de la tabla completa: parametros y resultados
+def fieldNames():
+    return list(DEFAULTS) + RESULT_FIELDS
+
+def printTable(rows):
+    names = fieldNames()
+    print(tabulate([[row[name] for name in names] for row in rows], headers=names, tablefmt='psql', floatfmt='.3f'))
+
+def writeCSV(rows, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldNames())
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    configs = grid(scheduler=['fcfs', 'rr', 'mlfq', 'cfs', 'srtf'], quantum=[2, 4], frameSize=[2, 4], workload=['guia', 'mixed'])
+    printTable(sweep(configs))
@@ -0,0 +1,10 @@
+import collections
+import collections.abc
+import os
+import sys
+
+# tabulate (incluido en la practica) importa Iterable de collections, que no existe desde python 3.10
+collections.Iterable = collections.abc.Iterable
+
+# los modulos de la practica se importan como modulos sueltos (from hardware import *)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,15 @@
+import pytest
+
+from hardware import *
+
+
+def test_io_keeps_the_device_id_in_the_operand():
+    instruction = ASM.IO(OPERAND_MASK)
+    assert ASM.opcode(instruction) == OPCODE_IO
+    assert ASM.operand(instruction) == OPERAND_MASK
+
+
+@pytest.mark.parametrize("deviceId", [-1, OPERAND_MASK + 1])
+def test_io_with_device_id_out_of_range_raises(deviceId):
+    with pytest.raises(Exception, match="Invalid IO device id"):
+        ASM.IO(deviceId)
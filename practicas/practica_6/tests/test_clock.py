@@ -0,0 +1,42 @@
+import pytest
+
+from so import *
+from designer import LoggerDesign
+
+
+# la condicion de corte no debe ignorar un arribo demorado que todavia esta agendado en el clock
+@pytest.mark.parametrize("eventDriven", [False, True])
+def test_stop_condition_waits_for_delayed_arrivals(eventDriven):
+    hardware = Hardware()
+    hardware.setup(64, headless=True, eventDriven=eventDriven)
+    kernel = Kernel(FCFSScheduler(), 4, KillFifo(), hardware, LoggerDesign())
+    kernel.fileSystem.write("c:/a.exe", Program("a.exe", [ASM.CPU(2)]))
+    kernel.fileSystem.write("c:/b.exe", Program("b.exe", [ASM.CPU(3)]))
+    kernel.run("c:/a.exe", 1)
+    kernel.runWithDelay("c:/b.exe", 1, 20)
+
+    hardware.clock.stopWhen(kernel.pcbTable.allTerminated)
+    hardware.clock.do_ticks(1000)
+
+    assert kernel.pcbTable.count(TERMINATED) == 2
+    assert 20 < hardware.clock.currentTick < 1000
+
+
+def runLongBursts(eventDriven):
+    hardware = Hardware()
+    hardware.setup(256, headless=True, eventDriven=eventDriven)
+    kernel = Kernel(RoundRobin(7), 8, KillFifo(), hardware, LoggerDesign())
+    kernel.fileSystem.write("c:/a.exe", Program("a.exe", [ASM.CPU(60), ASM.IO(), ASM.CPU(25)]))
+    kernel.fileSystem.write("c:/b.exe", Program("b.exe", [ASM.CPU(90)]))
+    kernel.run("c:/a.exe", 1)
+    kernel.runWithDelay("c:/b.exe", 1, 13)
+
+    hardware.clock.stopWhen(kernel.pcbTable.allTerminated)
+    hardware.clock.do_ticks(10000)
+    tlb = hardware.mmu.tlb
+    return hardware.clock.currentTick, hardware.mmu.pageFaults, tlb.hits, tlb.misses
+
+
+# las rafagas de CPU que cruzan paginas y superan el quantum no deben cambiar nada al saltearlas
+def test_event_driven_skips_match_tick_by_tick():
+    assert runLongBursts(True) == runLongBursts(False)
@@ -0,0 +1,35 @@
+from so import *
+from designer import LoggerDesign
+
+
+def test_frame_flags_have_one_entry_per_frame():
+    hardware = Hardware()
+    hardware.setup(64, headless=True)
+    Kernel(FCFSScheduler(), 4, KillFifo(), hardware, LoggerDesign())
+    assert hardware.frameFlags.frames == 16
+
+
+# una pagina escrita por el MMU queda sucia: ESC desaloja antes la limpia aunque se haya cargado despues
+def test_enhanced_second_chance_evicts_clean_page_before_written_one():
+    hardware = Hardware()
+    hardware.setup(16, headless=True)
+    hardware.setFrameSize(4)
+    killer = KillEnhancedSecondChance()
+    killer.setHardware(hardware)
+    pcb = PCB(0, "c:/prog.exe", 1)
+    for page in [0, 1]:
+        hardware.frameFlags.loaded(page)
+        pcb.addPageToTable(page, page)
+        killer.newFrame(pcb, page, page)
+    mmu = hardware.mmu
+    mmu.setPageTable(pcb.pageTable)
+    mmu.limit = 7
+
+    mmu.write(1, INSTRUCTION_IO)
+    mmu.fetch(5)
+
+    assert hardware.frameFlags.isDirty(0)
+    assert not hardware.frameFlags.isDirty(1)
+    assert hardware.memory.read(1) == INSTRUCTION_IO
+    assert killer.nextToKill() == (pcb, 1, 1)
+    assert pcb.pageTable == {0: 0}
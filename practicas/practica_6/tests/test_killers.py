@@ -0,0 +1,66 @@
+import pytest
+
+from so import *
+
+
+def newKiller(killerClass, memorySize=64, frameSize=4):
+    hardware = Hardware()
+    hardware.setup(memorySize, headless=True)
+    hardware.setFrameSize(frameSize)
+    killer = killerClass()
+    killer.setHardware(hardware)
+    return killer, hardware
+
+
+# los frames liberados al terminar los procesos no dejan el heap creciendo para siempre
+def test_heap_stays_bounded_when_frames_are_freed():
+    killer, hardware = newKiller(KillLRU)
+    pcb = PCB(0, "c:/prog.exe", 1)
+    for page in range(1000):
+        frame = page % 16
+        hardware.frameFlags.loaded(frame)
+        killer.newFrame(pcb, page, frame)
+        hardware.frameFlags.reference(frame)
+        if page % 3:
+            killer.removeFrame(frame)
+    assert killer.heapSize <= 2 * 16 + 1
+
+
+def test_lru_still_picks_least_recently_used_after_compacting():
+    killer, hardware = newKiller(KillLRU)
+    pcb = PCB(0, "c:/prog.exe", 1)
+    for frame in range(4):
+        hardware.frameFlags.loaded(frame)
+        pcb.addPageToTable(frame, frame)
+        killer.newFrame(pcb, frame, frame)
+    for _ in range(3):
+        killer.removeFrame(3)
+        killer.newFrame(pcb, 3, 3)
+    for frame in [0, 2, 3, 1]:
+        hardware.frameFlags.reference(frame)
+    killer.removeFrame(3)
+    killer.removeFrame(1)
+
+    assert killer.nextToKill() == (pcb, 0, 0)
+
+
+def test_enhanced_second_chance_without_frames_raises():
+    killer, hardware = newKiller(KillEnhancedSecondChance)
+    with pytest.raises(Exception, match="no frames to kill"):
+        killer.nextToKill()
+
+
+# la aguja avanza mientras busca: los frames con segunda oportunidad quedan al final
+@pytest.mark.parametrize("killerClass", [KillClock, KillEnhancedSecondChance])
+def test_second_chance_moves_the_hand_past_referenced_frames(killerClass):
+    killer, hardware = newKiller(killerClass)
+    pcb = PCB(0, "c:/prog.exe", 1)
+    for frame in range(4):
+        hardware.frameFlags.loaded(frame)
+        pcb.addPageToTable(frame, frame)
+        killer.newFrame(pcb, frame, frame)
+    hardware.frameFlags.reference(0)
+    hardware.frameFlags.reference(1)
+
+    assert killer.nextToKill() == (pcb, 2, 2)
+    assert repr(killer) == "{}([3, 0, 1])".format(killerClass.__name__)
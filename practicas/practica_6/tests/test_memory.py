@@ -0,0 +1,18 @@
+import pytest
+
+from hardware import *
+
+
+def test_write_block_inside_memory():
+    memory = Memory(4)
+    memory.write_block(1, [1, 2, 3])
+    assert list(memory.read_block(0, 4)) == [OPCODE_NOOP, 1, 2, 3]
+
+
+# un bloque que se pasa del final no puede agrandar la memoria
+def test_write_block_past_the_end_raises():
+    memory = Memory(4)
+    with pytest.raises(IndexError):
+        memory.write_block(2, [1, 2, 3, 4])
+    assert memory.size == 4
+    assert len(memory.read_block(0, 10)) == 4
@@ -0,0 +1,52 @@
+import numpy as np
+
+from so import *
+from designer import GanttRecorder
+from metrics import processMetrics
+
+
+class Table():
+
+    def __init__(self, pcbs):
+        self._pcbs = pcbs
+
+    def allPCBs(self):
+        return self._pcbs
+
+
+def newPCB(pid, state):
+    pcb = PCB(pid, "p{}.exe".format(pid), 1)
+    pcb.setState(state)
+    return pcb
+
+
+# los ticks del recorder son de 64 bits en todas las plataformas (metrics los lee como int64)
+def test_recorder_ticks_are_64_bits():
+    assert GanttRecorder().ticks.itemsize == np.dtype(np.int64).itemsize
+
+
+def test_process_metrics_per_pid():
+    a = newPCB(0, RUNNING)
+    recorder = GanttRecorder()
+    recorder.record(Table([a]), [], 10, 2)
+    b = newPCB(1, READY)
+    recorder.record(Table([a, b]), [b], 12)
+    a.setState(TERMINATED)
+    b.setState(RUNNING)
+    recorder.record(Table([a, b]), [], 13, 3)
+    b.setState(WAITING)
+    recorder.record(Table([a, b]), [], 16)
+    c = newPCB(2, READY)
+    recorder.record(Table([b, c]), [c], 17)
+
+    metrics = processMetrics(recorder)
+
+    assert metrics['pid'].tolist() == [0, 1, 2]
+    assert metrics['arrival'].tolist() == [10, 12, 17]
+    assert metrics['firstRun'].tolist() == [10, 13, -1]
+    assert metrics['completion'].tolist() == [13, -1, -1]
+    assert metrics['cpu'].tolist() == [3, 3, 0]
+    assert metrics['ready'].tolist() == [0, 1, 1]
+    assert metrics['io'].tolist() == [0, 2, 0]
+    assert metrics['turnaround'].tolist() == [3, -1, -1]
+    assert metrics['response'].tolist() == [0, 1, -1]
@@ -0,0 +1,23 @@
+import sys
+
+from so import *
+from designer import LoggerDesign
+
+
+def newKernel(scheduler, memorySize=64, frameSize=4):
+    hardware = Hardware()
+    hardware.setup(memorySize, headless=True, eventDriven=True)
+    return hardware, Kernel(scheduler, frameSize, KillFifo(), hardware, LoggerDesign())
+
+
+# con mas procesos suspendidos que el limite de recursion, el dispatch no debe anidar una llamada por cada uno
+def test_parked_processes_do_not_exhaust_the_stack():
+    hardware, kernel = newKernel(RoundRobin(2))
+    kernel.memoryManager.setResidentSet(ResidentSetPolicy(minFrames=6))
+    kernel.fileSystem.write("c:/prog.exe", Program("prog.exe", [ASM.CPU(10), ASM.IO(), ASM.CPU(5)]))
+    processes = sys.getrecursionlimit() + 500
+    for _ in range(processes):
+        kernel.run("c:/prog.exe", 1)
+    hardware.clock.stopWhen(kernel.pcbTable.allTerminated)
+    hardware.clock.do_ticks(100 * processes)
+    assert kernel.pcbTable.count(TERMINATED) == processes
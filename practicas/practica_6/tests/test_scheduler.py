@@ -0,0 +1,79 @@
+from so import *
+from designer import LoggerDesign
+
+
+def newKernel(schedulers):
+    hardware = Hardware()
+    hardware.setup(64, headless=True, cores=len(schedulers))
+    return Kernel(schedulers, 4, KillFifo(), hardware, LoggerDesign())
+
+
+def newPCB(kernel, pid):
+    pcb = PCB(pid, "c:/prog.exe", 1)
+    kernel.pcbTable.add(pcb)
+    kernel.migrate(pcb, 0)
+    return pcb
+
+
+# un pcb robado por otro nucleo conserva su nivel y el nucleo viejo no se queda con su entrada
+def test_stolen_pcb_keeps_its_mlfq_level():
+    kernel = newKernel([MultilevelFeedbackQueue(), MultilevelFeedbackQueue()])
+    first, second = kernel.schedulers
+    pcb = newPCB(kernel, 2)
+    first.expired(pcb)
+    first.expired(pcb)
+    pcb.setState(READY)
+    first.add(pcb)
+
+    AbstractInterruptionHandler(kernel).runNextCicle(1)
+
+    assert kernel.pcbTable.runningPCBIn(1) is pcb
+    assert second.level(pcb) == 2
+    assert first.takeHistory(pcb) is None
+
+
+def test_migration_moves_burst_estimates():
+    kernel = newKernel([ShortestJobFirst(), ShortestJobFirst()])
+    first, second = kernel.schedulers
+    pcb = newPCB(kernel, 1)
+    first.giveHistory(pcb, (9, 3))
+
+    kernel.migrate(pcb, 1)
+
+    assert second.predictedBurst(pcb) == 9
+    assert second.elapsedBurst(pcb) == 3
+    assert first.takeHistory(pcb) == (None, None)
+
+
+def test_migration_keeps_vruntime_relative_to_each_queue():
+    kernel = newKernel([CompletelyFairScheduler(), CompletelyFairScheduler()])
+    first, second = kernel.schedulers
+    pcb = newPCB(kernel, 1)
+    first.giveHistory(pcb, 4)
+    # la readyQ del otro nucleo ya avanzo: su menor vruntime es 10
+    resident = PCB(2, "c:/prog.exe", 1)
+    second.giveHistory(resident, 10)
+    second.add(resident)
+    second.updateMinVruntime()
+    newcomer = PCB(3, "c:/prog.exe", 1)
+    second.add(newcomer)
+
+    kernel.migrate(pcb, 1)
+    second.add(pcb)
+
+    assert second.vruntime(newcomer) == 10
+    assert second.vruntime(pcb) == 14
+    assert second.readyQ == [resident, newcomer, pcb]
+
+
+# con aging la expropiacion compara las claves de la misma epoca que usa add
+def test_preemptive_priority_with_aging_compares_current_keys():
+    kernel = newKernel([PreemptivePriorityScheduler(aging=True, ticksAge=2)])
+    scheduler = kernel.schedulers[0]
+    kernel.hardware.clock.do_ticks(9)
+    running = PCB(0, "c:/prog.exe", 3)
+
+    assert scheduler.key(PCB(1, "c:/prog.exe", 2)) == 2 + 9 // 2
+    assert scheduler.mustExpropiate(running, PCB(1, "c:/prog.exe", 2))
+    assert not scheduler.mustExpropiate(running, PCB(2, "c:/prog.exe", 3))
+    assert not scheduler.mustExpropiate(running, PCB(3, "c:/prog.exe", 4))
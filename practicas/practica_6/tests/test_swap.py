@@ -0,0 +1,36 @@
+from array import array
+
+import pytest
+
+from so import *
+from designer import LoggerDesign
+
+
+def page(value, frameSize=4):
+    return array('H', [value]) * frameSize
+
+
+def test_discard_process_frees_only_its_slots():
+    swap = SwapArea(4, 4)
+    swap.pageOut(1, 0, page(10))
+    swap.pageOut(2, 5, page(20))
+    swap.pageOut(1, 900, page(11))
+
+    swap.discardProcess(1)
+
+    assert swap.used == 1
+    assert not swap.contains(1, 0) and not swap.contains(1, 900)
+    assert list(swap.pageIn(2, 5)) == list(page(20))
+    assert swap.used == 0
+    swap.close()
+
+
+# cerrar el kernel cierra el archivo de swap
+def test_kernel_shutdown_closes_swap():
+    hardware = Hardware()
+    hardware.setup(16, headless=True)
+    with Kernel(FCFSScheduler(), 4, KillFifo(), hardware, LoggerDesign()) as kernel:
+        swap = kernel.memoryManager.swap
+        swap.pageOut(0, 0, page(1))
+    with pytest.raises(ValueError):
+        swap.pageIn(0, 0)
@@ -0,0 +1,18 @@
+import sweep
+from so import *
+
+
+def lateWorkload():
+    return [
+        ("c:/first.exe", Program("first.exe", [ASM.CPU(2)]), 1, 0),
+        ("c:/late.exe", Program("late.exe", [ASM.CPU(3)]), 1, 30),
+    ]
+
+
+# un arribo demorado que llega despues de que terminaron los demas tambien cuenta en el renglon
+def test_run_config_waits_for_late_arrivals(monkeypatch):
+    monkeypatch.setitem(sweep.WORKLOADS, 'late', lateWorkload)
+    row = sweep.runConfig(sweep.grid(workload=['late'])[0])
+    assert row['error'] == ''
+    assert row['finished'] == 2
+    assert row['ticks'] > 30
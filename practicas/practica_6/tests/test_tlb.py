@@ -0,0 +1,19 @@
+import pytest
+
+from hardware import *
+
+
+@pytest.mark.parametrize("entries, associativity", [(4, 8), (6, 4), (4, 0), (0, None)])
+def test_geometry_that_does_not_split_the_entries_raises(entries, associativity):
+    with pytest.raises(Exception, match="Invalid TLB geometry"):
+        TLB(entries, associativity)
+
+
+# 8 entradas en 2 conjuntos de 4: caben 4 paginas pares sin desalojarse entre ellas
+def test_set_associative_capacity_is_entries():
+    tlb = TLB(8, 4)
+    for page in [0, 2, 4, 6, 1, 3, 5, 7]:
+        tlb.insert(page, page)
+    assert all(tlb.lookup(page) == page for page in range(8))
+    tlb.insert(8, 8)
+    assert tlb.lookup(0) is None
@@ -0,0 +1,24 @@
+import pytest
+
+from tracer import *
+
+
+def test_enable_without_capacity_raises():
+    tracer = Tracer()
+    with pytest.raises(Exception, match="Invalid trace capacity"):
+        tracer.enable(0)
+    assert not tracer.enabled
+
+
+# despues de cerrar no se escribe mas en el buffer ni en el archivo
+def test_record_after_close_is_ignored(tmp_path):
+    path = str(tmp_path / "trace.bin")
+    tracer = Tracer()
+    tracer.enable(4, path)
+    tracer.record(1, EVENT_LOAD, 0, 5)
+    tracer.close()
+    tracer.record(2, EVENT_SAVE, 0, 6)
+
+    assert not tracer.enabled
+    assert [record.tick for record in tracer.records()] == [1]
+    assert [record.tick for record in readTrace(path)] == [1]
@@ -0,0 +1,141 @@
+import struct
+from collections import namedtuple
+
+## Trace binario de eventos del sistema
+## Cada evento se guarda como un registro de tamaño fijo dentro de un buffer circular
+## preasignado. Si se indica un archivo, el buffer se vuelca ahi antes de pisar
+## registros, asi no se pierde ningun evento en corridas largas.
+
+## tipos de evento
+EVENT_IRQ = 0             # a = codigo del tipo de irq, b = parametro (si es entero)
+EVENT_LOAD = 1            # el dispatcher carga un pcb: a = pc
+EVENT_SAVE = 2            # el dispatcher guarda un pcb: a = pc
+EVENT_PAGE_FAULT = 3      # a = pagina, b = frame donde se cargo
+EVENT_SWAP_OUT = 4        # pid/pagina de la victima, b = frame liberado
+EVENT_DEVICE_START = 5    # a = id del dispositivo (operando de la instruccion IO)
+EVENT_DEVICE_DONE = 6     # a = id del dispositivo (operando de la instruccion IO)
+EVENT_SUSPEND = 7         # se sacan de memoria todas las paginas del pcb: a = frames liberados
+EVENT_RESUME = 8          # el pcb suspendido vuelve a competir por memoria: a = frames que se le reservan
+EVENT_PREFETCH = 9        # lectura anticipada en un page fault: a = pagina, b = frame donde se cargo
+
+EVENT_NAMES = {
+    EVENT_IRQ: "IRQ",
+    EVENT_LOAD: "LOAD",
+    EVENT_SAVE: "SAVE",
+    EVENT_PAGE_FAULT: "PAGE_FAULT",
+    EVENT_SWAP_OUT: "SWAP_OUT",
+    EVENT_DEVICE_START: "DEVICE_START",
+    EVENT_DEVICE_DONE: "DEVICE_DONE",
+    EVENT_SUSPEND: "SUSPEND",
+    EVENT_RESUME: "RESUME",
+    EVENT_PREFETCH: "PREFETCH",
+}
+
+## registro: tick (uint64), evento (uint8), pid, a, b (int32)
+RECORD = struct.Struct('<QB3xiii')
+
+NO_PID = -1
+
+TraceRecord = namedtuple('TraceRecord', ['tick', 'event', 'pid', 'a', 'b'])
+
+
+class Tracer():
+
+    def __init__(self):
+        self._enabled = False
+        self._capacity = 0
+        self._buffer = None
+        self._next = 0          # proxima posicion a escribir en el buffer
+        self._count = 0         # registros validos en el buffer
+        self._pending = 0       # registros todavia no volcados al archivo
+        self._file = None
+
+    ## preasigna el buffer para "capacity" registros y, opcionalmente, abre el archivo de volcado
+    def enable(self, capacity=65536, path=None):
+        if capacity < 1:
+            raise Exception("Invalid trace capacity {capacity}: must hold at least 1 record".format(capacity=capacity))
+        self.close()
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * RECORD.size)
+        self._next = 0
+        self._count = 0
+        self._pending = 0
+        if path is not None:
+            self._file = open(path, 'wb')
+        self._enabled = True
+
+    def disable(self):
+        self._enabled = False
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def __len__(self):
+        return self._count
+
+    def record(self, tick, event, pid=NO_PID, a=0, b=0):
+        if not self._enabled:
+            return
+        if self._file is not None and self._pending == self._capacity:
+            self.flush()
+        RECORD.pack_into(self._buffer, self._next * RECORD.size, tick, event, pid, a, b)
+        self._next = (self._next + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+        self._pending = min(self._pending + 1, self._capacity)
+
+    ## vuelca al archivo los registros que todavia no se escribieron
+    def flush(self):
+        if self._file is None or self._pending == 0:
+            return
+        first = (self._next - self._pending) % self._capacity
+        last = first + self._pending
+        view = memoryview(self._buffer)
+        if last <= self._capacity:
+            self._file.write(view[first * RECORD.size:last * RECORD.size])
+        else:
+            self._file.write(view[first * RECORD.size:])
+            self._file.write(view[:(last - self._capacity) * RECORD.size])
+        self._file.flush()
+        self._pending = 0
+
+    ## vuelca lo pendiente y cierra el archivo: no se registra nada mas hasta otro enable
+    ## (lo que quedo en el buffer se puede seguir leyendo con records)
+    def close(self):
+        self.flush()
+        self._enabled = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    ## registros que estan en el buffer, del mas viejo al mas nuevo
+    def records(self):
+        first = (self._next - self._count) % max(1, self._capacity)
+        for i in range(self._count):
+            position = (first + i) % self._capacity
+            yield TraceRecord(*RECORD.unpack_from(self._buffer, position * RECORD.size))
+
+
+## lee un trace volcado a archivo
+def readTrace(path):
+    with open(path, 'rb') as traceFile:
+        data = traceFile.read()
+    for fields in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+        yield TraceRecord(*fields)
+
+
+## texto legible de un registro
+def describe(record):
+    from hardware import INTERRUPTION_TYPES
+    name = EVENT_NAMES.get(record.event, str(record.event))
+    if record.event == EVENT_IRQ:
+        return "{tick:>8} {name:<12} {type} {param}".format(tick=record.tick, name=name, type=INTERRUPTION_TYPES[record.a], param=record.b)
+    return "{tick:>8} {name:<12} pid={pid} a={a} b={b}".format(tick=record.tick, name=name, pid=record.pid, a=record.a, b=record.b)
+
+
+### TRACE is a global variable (desactivado hasta llamar a TRACE.enable)
+TRACE = Tracer()